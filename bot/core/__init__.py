@@ -1,2 +1,6 @@
 from .bot import Bot
 
+from .portfolio import PortfolioLedger
+from .order_tracker import OrderTracker
+from .strategy_runner import StrategyRunner
+from .value_history_compactor import ValueHistoryCompactor
@@ -1,6 +1,8 @@
 import logging
 from datetime import datetime
 import json
+from .portfolio import PortfolioLedger
+from .strategy_runner import StrategyRunner
 
 class Bot:
     """
@@ -10,34 +12,58 @@ class Bot:
     4. NOTE: PROBABLY SHOULD MOVE ALL THIS LOGIC FOR BUILDING `coin_data` DICTIONARY TO A NEW CLASS
     """
 
-    def __init__(self, api, db_manager, strategy, config, coin_data, trade_decision):
+    def __init__(self, api, db_manager, strategy, config, coin_data, trade_decision, ledger=None, order_tracker=None, features=None):
         """
         :param api: Exchange API object with methods like get_best_price(...)
         :param db_manager: DatabaseManager object managing specialized managers like ValueHistoryManager.
-        :param strategy: Instance of ScalpingStrategy (or TradingStrategy with the appropriate child passed).
+        :param strategy: StrategyRunner hosting one or more strategies. A single TradingStrategy is wrapped in one.
         :param config: Configuration object for bot parameters.
+        :param ledger: PortfolioLedger kept up to date from fills and each tick's price snapshot.
+        :param order_tracker: Optional OrderTracker polling placed orders for fills in the background.
+        :param features: FeatureRegistry memoizing per-tick features (defaults to the value history manager's).
         """
         self.api = api
         self.db_manager = db_manager
-        self.strategy = strategy
+        self.strategy = strategy if isinstance(strategy, StrategyRunner) else StrategyRunner([("default", strategy, 1.0)])
         self.config = config
         self.coins = json.loads(self.config.get("DEFAULT", "coins"))
         self.coin_data = coin_data
         self.trade_decision = trade_decision
+        self.ledger = ledger if ledger is not None else PortfolioLedger()
+        self.order_tracker = order_tracker
+        self.features = features if features is not None else self.db_manager.value_history.features
+        self.reconcile_interval = self.config.getint("DEFAULT", "reconcile_interval", fallback=30)
+        self.tick = 0
 
     # 8. Main execution loop
     def run(self):
+        self.features.begin_tick()
+
+        # The ledger is the only place account state comes from; it's seeded here and nowhere else
+        if not self.ledger.seeded and not self.ledger.seed(self.api, self.db_manager):
+            logging.error("Portfolio ledger not seeded (exchange unavailable). Skipping this tick.")
+            return
+
         all_coin_data = self.coin_data.compile_data(self.api, self.db_manager, self.config, self.coins)
 
         if not all_coin_data or "results" not in all_coin_data:
             logging.error("Failed to retrieve valid coin values from API. Exiting bot execution.")
             return
 
+        self.ledger.mark_to_market(all_coin_data["results"])
+        self.strategy.begin_tick()
+
         for coin_data in all_coin_data["results"]:
             try:
                 coin_symbol = coin_data["symbol"]
-                compiled_data = self.__compile_data(coin_symbol)
+                compiled_data = self.coin_data.compile_coin_data(
+                    self.api, self.db_manager, self.config, all_coin_data, coin_data
+                )
                 compiled_data["api"] = self.api  # Inject API for orders
+                compiled_data["db_manager"] = self.db_manager
+                compiled_data["ledger"] = self.ledger
+                compiled_data["order_tracker"] = self.order_tracker
+                compiled_data["features"] = self.features
 
                 self.strategy.execute_strategy(compiled_data)
             except Exception as e:
@@ -48,6 +74,7 @@ class Bot:
                 executed_orders = self.api.get_executed_orders(coin_symbol, last_timestamp)
 
                 for order in executed_orders:
+                    self.ledger.apply_fill(order)
                     self.strategy.handle_post_buy_actions(order, self.api)
 
                     table_name = f"{coin_symbol.replace('-USD', '').lower()}_order_history"
@@ -56,3 +83,8 @@ class Bot:
                     self.db_manager.timestamps.update_last_timestamp(coin_symbol, order["updated_at"])
             except Exception as e:
                 logging.error(f"Error processing executed orders for {coin_symbol}: {e}", exc_info=True)
+
+        self.tick += 1
+        if self.reconcile_interval and self.tick % self.reconcile_interval == 0:
+            self.ledger.reconcile(self.api)
+
@@ -0,0 +1,209 @@
+import logging
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+TERMINAL_STATES = {"filled", "canceled", "failed"}
+
+
+class OrderTracker:
+    """
+    Polls placed orders in a background thread so fills are seen without waiting for the next tick.
+    1. Strategies register each order id returned by ExchangeAPI.place_order(...).
+    2. Each order is polled with adaptive backoff: fast right after placement, slower as it rests.
+       Due orders are polled concurrently (up to `poll_workers` at a time).
+    3. Fills (including partial fills) go straight to the ledger and the order history tables.
+    4. Limit orders still open after `stale_after` seconds are cancelled.
+    5. An order whose lookups keep failing (e.g. 404) is cancelled once stale and dropped after
+       `max_failed_lookups` consecutive failures, so it isn't polled forever.
+    """
+
+    def __init__(self, api, db_manager, ledger, initial_interval=0.5, max_interval=10.0,
+                 backoff=1.5, stale_after=300.0, poll_workers=8, max_failed_lookups=20):
+        """
+        :param api: ExchangeAPI used for get_order(...) / cancel_order(...).
+        :param db_manager: DatabaseManager with its OWN connection - it is used from the tracker thread.
+        :param ledger: PortfolioLedger receiving fill events.
+        :param initial_interval: Seconds between polls right after an order is registered.
+        :param max_interval: Upper bound on the poll interval.
+        :param backoff: Multiplier applied to the interval after every poll without progress.
+        :param stale_after: Seconds after which a resting order is cancelled (None disables).
+        :param poll_workers: Maximum number of orders polled at the same time.
+        :param max_failed_lookups: Consecutive failed get_order(...) calls after which an order is no longer tracked.
+        """
+        self.api = api
+        self.db_manager = db_manager
+        self.ledger = ledger
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.stale_after = stale_after
+        self.poll_workers = poll_workers
+        self.max_failed_lookups = max_failed_lookups
+
+        self._orders = {}  # order id -> tracking state
+        self._latencies = []  # seconds from registration to full fill
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()  # the tracker's DB connection is shared by the poll workers
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="order-tracker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stopped.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def register(self, order):
+        """
+        Start tracking an order returned by ExchangeAPI.place_order(...).
+        """
+        if not order or "id" not in order:
+            logging.warning(f"Cannot track order without id: {order}")
+            return False
+
+        now = time.monotonic()
+        with self._lock:
+            self._orders[order["id"]] = {
+                "symbol": order.get("symbol"),
+                "registered_at": now,
+                "next_poll_at": now + self.initial_interval,
+                "interval": self.initial_interval,
+                "filled_quantity": 0.0,
+                "state": order.get("state"),
+                "cancel_requested": False,
+                "failed_lookups": 0,
+            }
+        self._wake.set()
+        return True
+
+    def pending(self):
+        with self._lock:
+            return len(self._orders)
+
+    def latency_stats(self):
+        """
+        Order-to-fill latency in seconds for fully filled orders seen by the tracker.
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+
+        if not latencies:
+            return {"count": 0}
+
+        return {
+            "count": len(latencies),
+            "mean": statistics.fmean(latencies),
+            "p50": latencies[len(latencies) // 2],
+            "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+            "max": latencies[-1],
+        }
+
+    def _run(self):
+        with ThreadPoolExecutor(max_workers=self.poll_workers, thread_name_prefix="order-poll") as pool:
+            while not self._stopped.is_set():
+                now = time.monotonic()
+                with self._lock:
+                    due = [order_id for order_id, tracked in self._orders.items() if tracked["next_poll_at"] <= now]
+                    next_due = min((tracked["next_poll_at"] for tracked in self._orders.values()), default=None)
+
+                # Wait for the whole batch so an order is never polled twice at once
+                for future in [pool.submit(self._safe_poll, order_id) for order_id in due]:
+                    future.result()
+
+                if not due:
+                    self._wake.wait(None if next_due is None else max(0.0, next_due - time.monotonic()))
+                    self._wake.clear()
+
+    def _safe_poll(self, order_id):
+        try:
+            self._poll(order_id)
+        except Exception as e:
+            logging.error(f"Error polling order {order_id}: {e}", exc_info=True)
+
+    def _poll(self, order_id):
+        with self._lock:
+            tracked = self._orders.get(order_id)
+        if tracked is None:
+            return
+
+        order = self.api.get_order(order_id)
+        now = time.monotonic()
+        if order is None:
+            tracked["failed_lookups"] += 1
+            if tracked["failed_lookups"] >= self.max_failed_lookups:
+                with self._lock:
+                    self._orders.pop(order_id, None)
+                logging.warning(
+                    f"Stopped tracking order {order_id} for {tracked['symbol']}: "
+                    f"{tracked['failed_lookups']} lookups in a row returned no order data."
+                )
+                return
+            self._cancel_if_stale(order_id, tracked, now)
+            self._reschedule(tracked, now, progressed=False)
+            return
+        tracked["failed_lookups"] = 0
+
+        filled_quantity = float(order.get("filled_asset_quantity") or 0.0)
+        progressed = filled_quantity > tracked["filled_quantity"] or order.get("state") != tracked["state"]
+        tracked["state"] = order.get("state")
+
+        if filled_quantity > tracked["filled_quantity"]:
+            tracked["filled_quantity"] = filled_quantity
+            self._emit_fill(order)
+
+        if order.get("state") in TERMINAL_STATES:
+            with self._lock:
+                self._orders.pop(order_id, None)
+                if order.get("state") == "filled":
+                    self._latencies.append(now - tracked["registered_at"])
+            if progressed and order.get("state") != "filled":
+                self._record(order)
+            return
+
+        if self._cancel_if_stale(order_id, tracked, now):
+            progressed = True
+
+        self._reschedule(tracked, now, progressed)
+
+    def _cancel_if_stale(self, order_id, tracked, now):
+        if (
+            self.stale_after is None
+            or tracked["cancel_requested"]
+            or now - tracked["registered_at"] <= self.stale_after
+        ):
+            return False
+        logging.info(f"Cancelling stale order {order_id} for {tracked['symbol']} (state={tracked['state']}).")
+        if self.api.cancel_order(order_id):
+            tracked["cancel_requested"] = True
+            return True
+        return False
+
+    def _reschedule(self, tracked, now, progressed):
+        # Reset to fast polling on any progress (partial fill, state change, cancel), otherwise back off.
+        if progressed:
+            tracked["interval"] = self.initial_interval
+        else:
+            tracked["interval"] = min(tracked["interval"] * self.backoff, self.max_interval)
+        tracked["next_poll_at"] = now + tracked["interval"]
+
+    def _emit_fill(self, order):
+        self.ledger.apply_fill(order)
+        self._record(order)
+
+    def _record(self, order):
+        try:
+            table_name = f"{order['symbol'].replace('-USD', '').lower()}_order_history"
+            with self._db_lock:
+                self.db_manager.order_history.insert_or_update_order(table_name, order)
+        except Exception as e:
+            logging.error(f"Error recording order {order.get('id')}: {e}", exc_info=True)
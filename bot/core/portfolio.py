@@ -0,0 +1,336 @@
+import logging
+import threading
+
+OPEN_ORDER_STATES = {"open", "partially_filled"}
+
+
+class PortfolioLedger:
+    """
+    Local view of cash and holdings so the bot doesn't re-value the whole portfolio every tick.
+    1. Seeded once from the exchange holdings and account.
+    2. Updated incrementally from fills (deduplicated per order id, partial fills apply the delta).
+    3. Marked to market from the tick's best bid/ask snapshot.
+    4. Periodically reconciled against the exchange to detect drift.
+    5. Orders assigned to a strategy also book their fills to that strategy's own positions,
+       so strategies sharing the account don't trade each other's holdings (see view(...)).
+    All access is serialized so fills can be applied from the OrderTracker thread; the lock is
+    never held across exchange or database calls.
+    """
+
+    def __init__(self, allocation_fraction=0.02, drift_tolerance=1e-6):
+        """
+        :param allocation_fraction: Fraction of total portfolio value allocated to a single trade.
+        :param drift_tolerance: Absolute difference tolerated before reconciliation logs drift.
+        """
+        self.allocation_fraction = allocation_fraction
+        self.drift_tolerance = drift_tolerance
+        self.cash = 0.0
+        self.seeded = False
+        self._quantities = {}  # asset_code -> quantity held
+        self._marks = {}  # asset_code -> last mark price (ask inclusive of buy spread)
+        self._last_purchase_prices = {}  # asset_code -> last buy fill price
+        self._filled_quantities = {}  # order id -> filled quantity already applied
+        self._order_strategies = {}  # order id -> strategy that placed it
+        self._strategy_quantities = {}  # strategy name -> {asset_code: quantity opened by the strategy}
+        self._strategy_purchase_prices = {}  # strategy name -> {asset_code: last buy fill price}
+        self._holdings_value = 0.0
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _asset_code(symbol):
+        return symbol.replace("-USD", "")
+
+    # 1. Seed from the exchange (holdings + cash + orders + one price lookup for all holdings)
+    def seed(self, api, db_manager=None):
+        """
+        :param db_manager: Optional DatabaseManager; last purchase prices of held coins and the orders
+                           strategies placed in them are read from the order history, so take-profit /
+                           stop-loss and per-strategy positions keep working after a restart.
+        """
+        # Network and DB lookups happen before taking the lock so fills and reads never wait on them
+        state = self._fetch_exchange_state(api)
+        if state is None:
+            logging.error("Unable to seed portfolio ledger: exchange data unavailable.")
+            return False
+
+        cash, quantities, orders = state
+        price_results = []
+        if quantities:
+            price_data = api.get_best_price([f"{code}-USD" for code in quantities])
+            price_results = price_data.get("results", []) if price_data else []
+        last_purchase_prices = self._load_last_purchase_prices(db_manager, quantities) if db_manager else {}
+        strategy_orders = self._load_strategy_orders(db_manager, quantities) if db_manager else []
+
+        with self._lock:
+            self.cash = cash
+            self._quantities = quantities
+            self._restore_strategy_positions(strategy_orders)
+            self._absorb_orders(orders)
+            self.mark_to_market(price_results)
+            for asset_code, price in last_purchase_prices.items():
+                self._last_purchase_prices.setdefault(asset_code, price)
+
+            self._recompute_holdings_value()
+            self.seeded = True
+            logging.info(f"Portfolio ledger seeded: cash={self.cash}, holdings={self._quantities}")
+            return True
+
+    # 2. Apply a (possibly partial) fill
+    def apply_fill(self, order):
+        """
+        Apply the not-yet-applied part of an order's filled quantity to cash and holdings.
+        Safe to call repeatedly with the same order as it progresses.
+        """
+        with self._lock:
+            order_id = order.get("id")
+            symbol = order.get("symbol")
+            if not order_id or not symbol:
+                logging.warning(f"Ignoring fill without id/symbol: {order}")
+                return False
+
+            filled_quantity = float(order.get("filled_asset_quantity") or 0.0)
+            delta = filled_quantity - self._filled_quantities.get(order_id, 0.0)
+            if delta <= 0:
+                return False
+
+            price = float(order.get("average_price") or 0.0)
+            asset_code = self._asset_code(symbol)
+            signed_delta = delta if order.get("side") == "buy" else -delta
+
+            self._filled_quantities[order_id] = filled_quantity
+            self.cash -= signed_delta * price
+            self._quantities[asset_code] = self._quantities.get(asset_code, 0.0) + signed_delta
+            self._holdings_value += signed_delta * self._marks.get(asset_code, price)
+            self._marks.setdefault(asset_code, price)
+
+            if order.get("side") == "buy":
+                self._last_purchase_prices[asset_code] = price
+            if self._quantities[asset_code] <= 0:
+                self._holdings_value -= self._quantities.pop(asset_code) * self._marks[asset_code]
+
+            self._book_fill(order_id, asset_code, signed_delta, price)
+            return True
+
+    def assign_order(self, order_id, strategy_name):
+        """
+        Attribute an order to the strategy that placed it. Call before its fills are applied.
+        """
+        with self._lock:
+            self._order_strategies[order_id] = strategy_name
+
+    def view(self, strategy_name):
+        """
+        Positions opened by one strategy's orders. Holdings that predate the process (or were
+        placed outside the bot) belong to no strategy and aren't visible through a view.
+        """
+        return StrategyPositions(self, strategy_name)
+
+    # 3. Mark to market from the tick's snapshot
+    def mark_to_market(self, price_results):
+        """
+        :param price_results: The "results" list returned by ExchangeAPI.get_best_price(...).
+        """
+        with self._lock:
+            for price_info in price_results:
+                asset_code = self._asset_code(price_info["symbol"])
+                new_mark = float(price_info["ask_inclusive_of_buy_spread"])
+                old_mark = self._marks.get(asset_code, new_mark)
+                self._marks[asset_code] = new_mark
+                self._holdings_value += self._quantities.get(asset_code, 0.0) * (new_mark - old_mark)
+
+    # 4. O(1) lookups
+    def total_value(self):
+        with self._lock:
+            return self.cash + self._holdings_value
+
+    def allocation(self):
+        with self._lock:
+            return self.allocation_fraction * self.total_value()
+
+    def exposure(self, coin):
+        with self._lock:
+            asset_code = self._asset_code(coin)
+            return self._quantities.get(asset_code, 0.0) * self._marks.get(asset_code, 0.0)
+
+    def quantity(self, coin):
+        with self._lock:
+            return self._quantities.get(self._asset_code(coin), 0.0)
+
+    def holds(self, coin):
+        return self.quantity(coin) > 0
+
+    def holdings(self):
+        """
+        Held assets in the shape of ExchangeAPI.get_holdings() results, plus the last purchase price when known.
+        """
+        with self._lock:
+            holdings = []
+            for asset_code, quantity in self._quantities.items():
+                holding = {"asset_code": asset_code, "total_quantity": str(quantity)}
+                if asset_code in self._last_purchase_prices:
+                    holding["last_purchase_price"] = str(self._last_purchase_prices[asset_code])
+                holdings.append(holding)
+            return holdings
+
+    def last_purchase_price(self, coin):
+        with self._lock:
+            return self._last_purchase_prices.get(self._asset_code(coin))
+
+    # 5. Reconcile against the exchange
+    def reconcile(self, api):
+        """
+        Compare the ledger with exchange cash and holdings, log any drift and reset to the exchange values.
+        :return: Dictionary of drifted fields to (ledger_value, exchange_value), or None if the exchange was unavailable.
+        """
+        state = self._fetch_exchange_state(api)
+        if state is None:
+            logging.warning("Skipping portfolio reconciliation: exchange data unavailable.")
+            return None
+
+        exchange_cash, exchange_quantities, orders = state
+        with self._lock:
+            drift = {}
+            if abs(exchange_cash - self.cash) > self.drift_tolerance:
+                drift["cash"] = (self.cash, exchange_cash)
+
+            for asset_code in set(exchange_quantities) | set(self._quantities):
+                ledger_quantity = self._quantities.get(asset_code, 0.0)
+                exchange_quantity = exchange_quantities.get(asset_code, 0.0)
+                if abs(exchange_quantity - ledger_quantity) > self.drift_tolerance:
+                    drift[asset_code] = (ledger_quantity, exchange_quantity)
+
+            if drift:
+                logging.warning(f"Portfolio ledger drift detected, resetting to exchange values: {drift}")
+
+            self.cash = exchange_cash
+            self._quantities = exchange_quantities
+            self._absorb_orders(orders)
+            self._recompute_holdings_value()
+            return drift
+
+    @staticmethod
+    def _load_last_purchase_prices(db_manager, quantities):
+        prices = {}
+        for asset_code in quantities:
+            try:
+                price = db_manager.order_history.get_last_buy_price(f"{asset_code.lower()}_order_history")
+            except Exception as e:
+                logging.warning(f"No last purchase price for {asset_code} in order history: {e}")
+                continue
+            if price:
+                prices[asset_code] = price
+        return prices
+
+    @staticmethod
+    def _load_strategy_orders(db_manager, quantities):
+        orders = []
+        for asset_code in quantities:
+            try:
+                rows = db_manager.order_history.get_strategy_orders(f"{asset_code.lower()}_order_history")
+            except Exception as e:
+                logging.warning(f"No strategy orders for {asset_code} in order history: {e}")
+                continue
+            orders.extend((asset_code,) + tuple(row) for row in rows)
+        return orders
+
+    def _restore_strategy_positions(self, strategy_orders):
+        # Rebuild the strategy books from recorded fills; _absorb_orders then adds anything that
+        # filled on the exchange after it was last recorded.
+        for asset_code, order_id, strategy_name, side, filled_quantity, price in strategy_orders:
+            self._order_strategies[order_id] = strategy_name
+            self._filled_quantities[order_id] = filled_quantity
+            if filled_quantity > 0:
+                self._book_fill(order_id, asset_code, filled_quantity if side == "buy" else -filled_quantity, price)
+
+    @staticmethod
+    def _fetch_exchange_state(api):
+        """
+        Cash, holdings and orders as the exchange reports them.
+        Buying power excludes what is held for open buy orders, so that is added back: the ledger
+        takes a buy's cost out of cash when it fills, not when it is placed.
+        :return: (cash, {asset_code: quantity}, orders), or None if any call failed.
+        """
+        holdings = api.get_holdings()
+        buying_power = api.get_account()
+        orders = api.get_orders()
+        if holdings is None or buying_power is None or orders is None:
+            return None
+
+        quantities = {
+            holding["asset_code"]: float(holding["total_quantity"])
+            for holding in holdings
+            if float(holding["total_quantity"]) > 0
+        }
+        held_for_buys = sum(
+            PortfolioLedger._held_for_order(order)
+            for order in orders
+            if order.get("side") == "buy" and order.get("state") in OPEN_ORDER_STATES
+        )
+        return float(buying_power) + held_for_buys, quantities, orders
+
+    @staticmethod
+    def _held_for_order(order):
+        config = order.get("limit_order_config") or order.get("stop_limit_order_config") or {}
+        try:
+            remaining = float(config["asset_quantity"]) - float(order.get("filled_asset_quantity") or 0.0)
+            return max(0.0, remaining) * float(config["limit_price"])
+        except (KeyError, TypeError, ValueError):
+            return 0.0
+
+    def _absorb_orders(self, orders):
+        # Whatever has filled so far is already in the exchange balances - don't apply it again later.
+        # Fills of assigned orders that the ledger hadn't seen yet still go to the strategy's book.
+        for order in orders:
+            order_id = order.get("id")
+            if not order_id:
+                continue
+            filled_quantity = float(order.get("filled_asset_quantity") or 0.0)
+            delta = filled_quantity - self._filled_quantities.get(order_id, 0.0)
+            self._filled_quantities[order_id] = filled_quantity
+            if delta > 0 and order.get("symbol"):
+                signed_delta = delta if order.get("side") == "buy" else -delta
+                self._book_fill(order_id, self._asset_code(order["symbol"]), signed_delta,
+                                float(order.get("average_price") or 0.0))
+
+    def _book_fill(self, order_id, asset_code, signed_delta, price):
+        strategy_name = self._order_strategies.get(order_id)
+        if strategy_name is None:
+            return
+        quantities = self._strategy_quantities.setdefault(strategy_name, {})
+        quantities[asset_code] = quantities.get(asset_code, 0.0) + signed_delta
+        if signed_delta > 0:
+            self._strategy_purchase_prices.setdefault(strategy_name, {})[asset_code] = price
+        if quantities[asset_code] <= self.drift_tolerance:
+            quantities.pop(asset_code)
+
+    def _recompute_holdings_value(self):
+        self._holdings_value = sum(
+            quantity * self._marks.get(asset_code, 0.0)
+            for asset_code, quantity in self._quantities.items()
+        )
+
+
+class StrategyPositions:
+    """
+    One strategy's slice of a PortfolioLedger, with the same lookups strategies use on the ledger.
+    """
+
+    def __init__(self, ledger, strategy_name):
+        self.ledger = ledger
+        self.strategy_name = strategy_name
+
+    def quantity(self, coin):
+        ledger = self.ledger
+        with ledger._lock:
+            asset_code = ledger._asset_code(coin)
+            booked = ledger._strategy_quantities.get(self.strategy_name, {}).get(asset_code, 0.0)
+            # Never more than the account actually holds (e.g. after a manual sell found by reconcile)
+            return min(booked, ledger._quantities.get(asset_code, 0.0))
+
+    def holds(self, coin):
+        return self.quantity(coin) > 0
+
+    def last_purchase_price(self, coin):
+        ledger = self.ledger
+        with ledger._lock:
+            return ledger._strategy_purchase_prices.get(self.strategy_name, {}).get(ledger._asset_code(coin))
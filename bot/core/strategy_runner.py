@@ -0,0 +1,158 @@
+import logging
+import statistics
+import time
+from collections import deque
+
+
+class _StrategyApi:
+    """
+    Wraps the exchange API handed to a strategy.
+    1. Accumulates the time spent in its calls, so exchange latency isn't charged to the decision budget.
+    2. Assigns every order it places to the strategy in the ledger and records the assignment in the
+       database, so the strategy's positions can be rebuilt after a restart.
+    """
+
+    def __init__(self, api, ledger=None, strategy_name=None, db_manager=None):
+        self._api = api
+        self._ledger = ledger
+        self._strategy_name = strategy_name
+        self._db_manager = db_manager
+        self.io_time = 0.0
+
+    def __getattr__(self, name):
+        attribute = getattr(self._api, name)
+        if not callable(attribute):
+            return attribute
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = attribute(*args, **kwargs)
+                if name == "place_order":
+                    self._assign(result)
+                return result
+            finally:
+                self.io_time += time.perf_counter() - start
+        return timed
+
+    def _assign(self, order):
+        if not isinstance(order, dict) or not order.get("id"):
+            return
+        if self._ledger is not None:
+            self._ledger.assign_order(order["id"], self._strategy_name)
+        if self._db_manager is not None:
+            try:
+                self._db_manager.order_history.assign_strategy(order["id"], order.get("symbol"), self._strategy_name)
+            except Exception as e:
+                logging.error(f"Error recording strategy for order {order['id']}: {e}", exc_info=True)
+
+
+class StrategyRunner:
+    """
+    Hosts several strategies in one process so they share a tick's snapshot, features and holdings.
+    1. Bot builds `compiled_data` once per coin and hands it to the runner.
+    2. Each strategy gets a shallow copy with `buying_power` scaled by its capital weight.
+       With more than one strategy, `ledger` is replaced by that strategy's own positions
+       (PortfolioLedger.view), so a strategy only ever exits what its own orders bought.
+       Holdings not opened by any strategy's orders are then left alone. Attribution is stored in
+       the order history, and the ledger rebuilds each strategy's positions when it is seeded.
+    3. Decision latency (excluding time spent in exchange API calls) is recorded per strategy.
+    4. A strategy that uses up its per-tick time budget only runs for coins it holds for the rest
+       of the tick, so take-profit / stop-loss exits are never skipped - only new entries are.
+    """
+
+    def __init__(self, strategies, time_budget=None):
+        """
+        :param strategies: List of (name, strategy, capital_weight) tuples. Weights are fractions of the allocation.
+        :param time_budget: Seconds each strategy may spend deciding per tick, not counting exchange API calls
+                            (None disables the budget).
+        """
+        total_weight = sum(weight for _, _, weight in strategies)
+        if total_weight > 1.0 + 1e-9:
+            raise ValueError(f"Strategy capital weights sum to {total_weight}, expected at most 1.0.")
+
+        self.strategies = strategies
+        self.time_budget = time_budget
+        self._latencies = {name: deque(maxlen=10000) for name, _, _ in strategies}
+        self._skipped = {name: 0 for name, _, _ in strategies}
+        self._spent = {name: 0.0 for name, _, _ in strategies}
+
+    def begin_tick(self):
+        """
+        Reset per-tick time accounting. Called by Bot before iterating coins.
+        """
+        for name in self._spent:
+            self._spent[name] = 0.0
+
+    def execute_strategy(self, compiled_data):
+        for name, strategy, weight in self.strategies:
+            ledger = compiled_data.get("ledger")
+            strategy_data = dict(compiled_data)
+            strategy_data["buying_power"] = float(compiled_data.get("buying_power", 0.0)) * weight
+            if ledger is not None and len(self.strategies) > 1:
+                strategy_data["ledger"] = ledger.view(name)
+
+            if self._over_budget(name) and not self._holds(strategy_data):
+                self._skipped[name] += 1
+                logging.debug(f"Skipping {name} for {compiled_data.get('symbol')}: tick time budget exhausted.")
+                continue
+
+            strategy_api = (
+                _StrategyApi(compiled_data["api"], ledger, name, compiled_data.get("db_manager"))
+                if compiled_data.get("api") is not None else None
+            )
+            if strategy_api is not None:
+                strategy_data["api"] = strategy_api
+
+            start = time.perf_counter()
+            try:
+                strategy.execute_strategy(strategy_data)
+            except Exception as e:
+                logging.error(f"Error executing strategy {name}: {e}", exc_info=True)
+            finally:
+                elapsed = time.perf_counter() - start - (strategy_api.io_time if strategy_api is not None else 0.0)
+                self._spent[name] += elapsed
+                self._latencies[name].append(elapsed)
+
+            if self._over_budget(name) and self._spent[name] - elapsed < self.time_budget:
+                logging.warning(
+                    f"Strategy {name} overran its {self.time_budget}s budget ({self._spent[name]:.3f}s); "
+                    f"only managing held positions for the rest of this tick."
+                )
+
+    def _over_budget(self, name):
+        return self.time_budget is not None and self._spent[name] >= self.time_budget
+
+    @staticmethod
+    def _holds(compiled_data):
+        coin = compiled_data.get("symbol", "")
+        ledger = compiled_data.get("ledger")
+        if ledger is not None:
+            return ledger.holds(coin)
+        return any(holding.get("asset_code") == coin.replace("-USD", "") for holding in compiled_data.get("holdings") or [])
+
+    def handle_post_buy_actions(self, order, api):
+        for name, strategy, _ in self.strategies:
+            handler = getattr(strategy, "handle_post_buy_actions", None)
+            if handler is None:
+                continue
+            try:
+                handler(order, api)
+            except Exception as e:
+                logging.error(f"Error in post-buy actions for {name}: {e}", exc_info=True)
+
+    def latency_stats(self):
+        """
+        Per-strategy decision latency in seconds (last 10k decisions) plus the number of skipped decisions.
+        """
+        stats = {}
+        for name, latencies in self._latencies.items():
+            ordered = sorted(latencies)
+            stats[name] = {"count": len(ordered), "skipped": self._skipped[name]}
+            if ordered:
+                stats[name].update({
+                    "mean": statistics.fmean(ordered),
+                    "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                    "max": ordered[-1],
+                })
+        return stats
@@ -0,0 +1,55 @@
+import logging
+import threading
+
+
+class ValueHistoryCompactor:
+    """
+    Runs the value history retention job in a background thread so it never stalls the trading loop.
+    1. Every `interval` seconds each coin's raw ticks older than `max_age` are folded into the rollups.
+    2. Work per coin per run is capped at `max_chunks` hours of raw data, so a large backlog is
+       worked off over several runs instead of in one long pass.
+    """
+
+    def __init__(self, db_manager, coins, max_age, interval=3600.0, max_chunks=24):
+        """
+        :param db_manager: DatabaseManager with its OWN connection - it is used from the compactor thread.
+        :param coins: Coin symbols whose value history is compacted.
+        :param max_age: timedelta of raw history to keep.
+        :param interval: Seconds between runs.
+        :param max_chunks: Hours of raw backlog compacted per coin per run.
+        """
+        self.db_manager = db_manager
+        self.coins = coins
+        self.max_age = max_age
+        self.interval = interval
+        self.max_chunks = max_chunks
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="value-history-compactor", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def run_once(self):
+        deleted = 0
+        for coin_symbol in self.coins:
+            if self._stopped.is_set():
+                break
+            try:
+                deleted += self.db_manager.value_history.compact(coin_symbol, self.max_age, max_chunks=self.max_chunks)
+            except Exception as e:
+                logging.error(f"Error compacting value history for {coin_symbol}: {e}", exc_info=True)
+        return deleted
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.run_once()
+
@@ -4,13 +4,14 @@ from .timestamps_manager import TimestampsManager
 
 
 class DatabaseManager:
-    def __init__(self, connection):
+    def __init__(self, connection, feature_registry=None):
         """
         Initialize DatabaseManager with a shared database connection
         and instantiate specialized managers.
+        :param feature_registry: FeatureRegistry shared with Bot so features are computed once per tick.
         """
         self.connection = connection
-        self.value_history = ValueHistoryManager(connection)
+        self.value_history = ValueHistoryManager(connection, feature_registry)
         self.order_history = OrderHistoryManager(connection)
         self.timestamps = TimestampsManager(connection)
 
@@ -1,10 +1,52 @@
 import logging
 import json
 
+STRATEGY_TABLE = "order_strategies"
+
 
 class OrderHistoryManager:
     def __init__(self, connection):
         self.connection = connection
+        self._strategy_table_ready = False
+
+    def ensure_strategy_table(self):
+        """
+        Create the shared order -> strategy attribution table if needed (once per process).
+        """
+        if self._strategy_table_ready:
+            return
+
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {STRATEGY_TABLE} (
+                    order_id VARCHAR(64) NOT NULL PRIMARY KEY,
+                    symbol VARCHAR(32) NOT NULL,
+                    strategy VARCHAR(64) NOT NULL
+                )
+            """)
+            self.connection.commit()
+            self._strategy_table_ready = True
+        finally:
+            cursor.close()
+
+    def assign_strategy(self, order_id, symbol, strategy):
+        """
+        Record which strategy placed an order, so per-strategy positions survive a restart.
+        """
+        self.ensure_strategy_table()
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(
+                f"""
+                INSERT INTO {STRATEGY_TABLE} (order_id, symbol, strategy) VALUES (%s, %s, %s)
+                ON DUPLICATE KEY UPDATE strategy = VALUES(strategy)
+                """,
+                (order_id, symbol, strategy),
+            )
+            self.connection.commit()
+        finally:
+            cursor.close()
 
     def insert_or_update_order(self, table_name, order_data):
         """
@@ -69,3 +111,35 @@ class OrderHistoryManager:
         cursor.close()
         return row[0] if row else None
 
+    def get_last_buy_price(self, table_name):
+        """
+        Average price of the most recently filled buy in the <coin>_order_history table.
+        """
+        cursor = self.connection.cursor()
+        sql = f"""
+            SELECT price FROM {table_name}
+            WHERE side = 'buy' AND state = 'filled'
+            ORDER BY updated_at DESC LIMIT 1
+        """
+        cursor.execute(sql)
+        row = cursor.fetchone()
+        cursor.close()
+        return float(row[0]) if row else None
+
+    def get_strategy_orders(self, table_name):
+        """
+        Orders in the <coin>_order_history table that were placed by a strategy, oldest update first.
+        :return: List of (order id, strategy, side, filled quantity, average price).
+        """
+        self.ensure_strategy_table()
+        cursor = self.connection.cursor()
+        sql = f"""
+            SELECT h.id, s.strategy, h.side, h.quantity, h.price
+            FROM {table_name} h JOIN {STRATEGY_TABLE} s ON s.order_id = h.id
+            ORDER BY h.updated_at
+        """
+        cursor.execute(sql)
+        rows = cursor.fetchall()
+        cursor.close()
+        return [(order_id, strategy, side, float(quantity or 0.0), float(price or 0.0))
+                for order_id, strategy, side, quantity, price in rows]
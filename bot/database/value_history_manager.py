@@ -1,12 +1,133 @@
+import datetime
 import logging
 import pandas as pd
+from bot.features import build_default_registry
+
+# Rollup table suffix -> pandas bucket frequency. Every interval must divide one hour evenly
+# so that compaction (aligned to the hour) never splits a bucket.
+ROLLUP_INTERVALS = {
+    "1m": "1min",
+    "5m": "5min",
+    "15m": "15min",
+    "1h": "1h",
+}
+
+# Features get_value_history(...) has always returned; other features (e.g. the gaps) are computed
+# from the registry by the consumers that need them, so their longer windows don't cut the history short.
+VALUE_HISTORY_FEATURES = ["spread", "price_change", "momentum", "volatility"]
+
+# Rollups live in one table per interval (value_history_rollup_<interval>) keyed by (symbol, bucket_start),
+# so a tick's upserts for every coin go out as one batched statement per interval.
+ROLLUP_COLUMNS = [
+    "symbol", "bucket_start", "open", "high", "low", "close",
+    "bid_high", "bid_low", "bid_close",
+    "ask_high", "ask_low", "ask_close",
+    "spread_min", "spread_max", "spread_sum",
+    "sample_count", "first_timestamp", "last_timestamp",
+]
+
 
 class ValueHistoryManager:
-    def __init__(self, connection):
+    def __init__(self, connection, feature_registry=None):
         self.connection = connection
+        self.features = feature_registry if feature_registry is not None else build_default_registry()
+        self._rollup_tables_ready = False
+
+    @staticmethod
+    def _table_name(coin_symbol):
+        return f"{coin_symbol.replace('-USD', '').lower()}_value_history"
+
+    @staticmethod
+    def _rollup_table_name(interval):
+        return f"value_history_rollup_{interval}"
+
+    @staticmethod
+    def _to_utc_naive(timestamp):
+        timestamp = pd.Timestamp(timestamp)
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.tz_convert("UTC").tz_localize(None)
+        return timestamp
+
+    def ensure_rollup_tables(self):
+        """
+        Create the value_history_rollup_<interval> tables if they don't exist yet.
+        """
+        if self._rollup_tables_ready:
+            return
+
+        cursor = self.connection.cursor()
+        try:
+            for interval in ROLLUP_INTERVALS:
+                cursor.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {self._rollup_table_name(interval)} (
+                        symbol VARCHAR(32) NOT NULL,
+                        bucket_start DATETIME NOT NULL,
+                        open DOUBLE, high DOUBLE, low DOUBLE, close DOUBLE,
+                        bid_high DOUBLE, bid_low DOUBLE, bid_close DOUBLE,
+                        ask_high DOUBLE, ask_low DOUBLE, ask_close DOUBLE,
+                        spread_min DOUBLE, spread_max DOUBLE, spread_sum DOUBLE,
+                        sample_count INT NOT NULL,
+                        first_timestamp DATETIME(6), last_timestamp DATETIME(6),
+                        PRIMARY KEY (symbol, bucket_start)
+                    )
+                """)
+            self.connection.commit()
+            self._rollup_tables_ready = True
+        finally:
+            cursor.close()
+
+    def _update_rollups(self, cursor, ticks):
+        """
+        Fold this tick's rows into every rollup interval with one batched upsert per interval.
+        Open/close only move when the tick is earlier/later than what the bucket has seen,
+        so out-of-order inserts stay correct.
+        :param ticks: List of (symbol, timestamp, price, ask_price, bid_price).
+        """
+        if not ticks:
+            return
+
+        for interval, freq in ROLLUP_INTERVALS.items():
+            sql = f"""
+                INSERT INTO {self._rollup_table_name(interval)} ({", ".join(ROLLUP_COLUMNS)})
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    open = IF(VALUES(first_timestamp) < first_timestamp, VALUES(open), open),
+                    close = IF(VALUES(last_timestamp) >= last_timestamp, VALUES(close), close),
+                    bid_close = IF(VALUES(last_timestamp) >= last_timestamp, VALUES(bid_close), bid_close),
+                    ask_close = IF(VALUES(last_timestamp) >= last_timestamp, VALUES(ask_close), ask_close),
+                    high = GREATEST(high, VALUES(high)),
+                    low = LEAST(low, VALUES(low)),
+                    bid_high = GREATEST(bid_high, VALUES(bid_high)),
+                    bid_low = LEAST(bid_low, VALUES(bid_low)),
+                    ask_high = GREATEST(ask_high, VALUES(ask_high)),
+                    ask_low = LEAST(ask_low, VALUES(ask_low)),
+                    spread_min = LEAST(spread_min, VALUES(spread_min)),
+                    spread_max = GREATEST(spread_max, VALUES(spread_max)),
+                    spread_sum = spread_sum + VALUES(spread_sum),
+                    sample_count = sample_count + VALUES(sample_count),
+                    first_timestamp = LEAST(first_timestamp, VALUES(first_timestamp)),
+                    last_timestamp = GREATEST(last_timestamp, VALUES(last_timestamp))
+            """
+            cursor.executemany(sql, [
+                self._rollup_row(symbol, timestamp, freq, price, ask_price, bid_price)
+                for symbol, timestamp, price, ask_price, bid_price in ticks
+            ])
+
+    @staticmethod
+    def _rollup_row(symbol, timestamp, freq, price, ask_price, bid_price):
+        spread = ask_price - bid_price
+        return (
+            symbol, timestamp.floor(freq).to_pydatetime(), price, price, price, price,
+            bid_price, bid_price, bid_price,
+            ask_price, ask_price, ask_price,
+            spread, spread, spread,
+            1, timestamp.to_pydatetime(), timestamp.to_pydatetime(),
+        )
 
     def insert_data(self, coin_data):
+        self.ensure_rollup_tables()
         cursor = self.connection.cursor()
+        ticks = []
         try:
             for data in coin_data:  # Iterate through the list of dictionaries
                 coin = data.get("symbol")
@@ -14,7 +135,7 @@ class ValueHistoryManager:
                     logging.warning("Skipping entry without a symbol.")
                     continue
                 
-                table_name = f"{coin.replace('-USD', '').lower()}_value_history"
+                table_name = self._table_name(coin)
                 timestamp = data.get("timestamp") or datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
                 price = float(data.get("price", 0.0))
                 ask_price = float(data.get("ask_inclusive_of_buy_spread", 0.0))
@@ -26,29 +147,163 @@ class ValueHistoryManager:
                     VALUES (%s, %s, %s, %s)
                 """
                 cursor.execute(sql, values)
-            
+                ticks.append((coin, self._to_utc_naive(timestamp), price, ask_price, bid_price))
+
+            self._update_rollups(cursor, ticks)
             self.connection.commit()
         except Exception as e:
+            # Don't leave this tick's raw rows pending for the next commit without their rollups
+            self.connection.rollback()
             logging.error(f"Error inserting data: {e}", exc_info=True)
         finally:
             cursor.close()
 
     def get_value_history(self, coin_symbol, length):
+        # Reuse this tick's frame if another consumer already loaded it
+        df = self.features.cached(coin_symbol, length)
+        if df is None:
+            cursor = self.connection.cursor()
+            table_name = self._table_name(coin_symbol)
+            query = f"SELECT timestamp, bid_inclusive_of_sell_spread, ask_inclusive_of_buy_spread FROM {table_name} ORDER BY timestamp DESC LIMIT {length}"
+            cursor.execute(query)
+            results = cursor.fetchall()
+            cursor.close()
+            # Convert to DataFrame
+            df = pd.DataFrame(results, columns=["timestamp", "bid_inclusive_of_sell_spread", "ask_inclusive_of_buy_spread"])
+            df['timestamp'] = pd.to_datetime(df['timestamp'])
+            df = df.sort_values('timestamp').reset_index(drop=True)
+
+        # Feature engineering (memoized per symbol per tick by the registry)
+        df = self.features.compute(coin_symbol, df, VALUE_HISTORY_FEATURES, length=length)
+
+        return df.dropna(subset=VALUE_HISTORY_FEATURES)
+
+    def get_rollup_history(self, coin_symbols, interval, length):
+        """
+        Rollup buckets from the last `length` intervals for several coins in one query, oldest first.
+        :param interval: One of ROLLUP_INTERVALS ("1m", "5m", "15m", "1h").
+        """
+        if interval not in ROLLUP_INTERVALS:
+            raise ValueError(f"Unknown rollup interval '{interval}'. Expected one of {list(ROLLUP_INTERVALS)}.")
+        if not coin_symbols:
+            return pd.DataFrame(columns=ROLLUP_COLUMNS + ["spread_avg"])
+
+        self.ensure_rollup_tables()
+        freq = pd.Timedelta(ROLLUP_INTERVALS[interval])
+        since = pd.Timestamp.now(tz="UTC").tz_localize(None).floor(freq) - (int(length) - 1) * freq
+
         cursor = self.connection.cursor()
-        table_name = f"{coin_symbol.replace('-USD', '').lower()}_value_history"
-        query = f"SELECT timestamp, bid_inclusive_of_sell_spread, ask_inclusive_of_buy_spread FROM {table_name} ORDER BY timestamp DESC LIMIT {length}"
-        cursor.execute(query)
+        query = f"""
+            SELECT {", ".join(ROLLUP_COLUMNS)} FROM {self._rollup_table_name(interval)}
+            WHERE symbol IN ({", ".join(["%s"] * len(coin_symbols))}) AND bucket_start >= %s
+        """
+        cursor.execute(query, (*coin_symbols, since.to_pydatetime()))
         results = cursor.fetchall()
         cursor.close()
-        # Convert to DataFrame
-        df = pd.DataFrame(results, columns=["timestamp", "bid_inclusive_of_sell_spread", "ask_inclusive_of_buy_spread"])
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df = df.sort_values('timestamp')
-        
-        # Feature engineering
-        df['spread'] = df['ask_inclusive_of_buy_spread'] - df['bid_inclusive_of_sell_spread']
-        df['price_change'] = df['bid_inclusive_of_sell_spread'].pct_change()
-        df['momentum'] = df['bid_inclusive_of_sell_spread'] - df['bid_inclusive_of_sell_spread'].shift(5)
-        df['volatility'] = df['bid_inclusive_of_sell_spread'].rolling(window=10).std()
-        
-        return df.dropna()
+
+        df = pd.DataFrame(results, columns=ROLLUP_COLUMNS)
+        df['bucket_start'] = pd.to_datetime(df['bucket_start'])
+        df = df.sort_values(['symbol', 'bucket_start'])
+        df['spread_avg'] = df['spread_sum'] / df['sample_count']
+        return df.reset_index(drop=True)
+
+    def compact(self, coin_symbol, max_age, chunk=pd.Timedelta(hours=1), max_chunks=None):
+        """
+        Retention job: fold raw ticks older than `max_age` into the rollup tables and delete them.
+        Buckets are rebuilt from the raw rows (REPLACE), so ticks written before rollups existed
+        are backfilled and re-running after a partial failure is harmless.
+        :param max_age: pd.Timedelta (or anything it accepts) of raw history to keep.
+        :param max_chunks: Stop after this many non-empty chunks; the rest of the backlog is left for the next run.
+        :return: Number of raw rows deleted.
+        """
+        self.ensure_rollup_tables()
+        table_name = self._table_name(coin_symbol)
+        cutoff = (pd.Timestamp.now(tz="UTC").tz_localize(None) - pd.Timedelta(max_age)).floor("1h")
+        deleted = 0
+
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(f"SELECT MIN(timestamp) FROM {table_name}")
+            row = cursor.fetchone()
+            if not row or row[0] is None:
+                return 0
+
+            window_start = self._to_utc_naive(row[0]).floor("1h")
+            chunks = 0
+            while window_start < cutoff and (max_chunks is None or chunks < max_chunks):
+                window_end = min(window_start + chunk, cutoff)
+                cursor.execute(
+                    f"""
+                        SELECT timestamp, price, ask_inclusive_of_buy_spread, bid_inclusive_of_sell_spread
+                        FROM {table_name} WHERE timestamp >= %s AND timestamp < %s
+                    """,
+                    (window_start.to_pydatetime(), window_end.to_pydatetime()),
+                )
+                raw = pd.DataFrame(cursor.fetchall(), columns=["timestamp", "price", "ask", "bid"])
+
+                if not raw.empty:
+                    for interval, freq in ROLLUP_INTERVALS.items():
+                        cursor.executemany(
+                            f"""
+                                REPLACE INTO {self._rollup_table_name(interval)} ({", ".join(ROLLUP_COLUMNS)})
+                                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                            """,
+                            self._build_rollups(coin_symbol, raw, freq),
+                        )
+                    cursor.execute(
+                        f"DELETE FROM {table_name} WHERE timestamp >= %s AND timestamp < %s",
+                        (window_start.to_pydatetime(), window_end.to_pydatetime()),
+                    )
+                    deleted += cursor.rowcount
+                    self.connection.commit()
+                    chunks += 1
+
+                window_start = window_end
+        except Exception as e:
+            self.connection.rollback()
+            logging.error(f"Error compacting value history for {coin_symbol}: {e}", exc_info=True)
+        finally:
+            cursor.close()
+
+        if deleted:
+            logging.info(f"Compacted {deleted} raw rows older than {cutoff} for {coin_symbol}.")
+        return deleted
+
+    @staticmethod
+    def _build_rollups(coin_symbol, raw, freq):
+        raw = raw.astype({"price": float, "ask": float, "bid": float})
+        raw["timestamp"] = pd.to_datetime(raw["timestamp"])
+        raw["spread"] = raw["ask"] - raw["bid"]
+        raw = raw.sort_values("timestamp")
+        grouped = raw.groupby(raw["timestamp"].dt.floor(freq))
+
+        rollups = pd.DataFrame({
+            "open": grouped["price"].first(),
+            "high": grouped["price"].max(),
+            "low": grouped["price"].min(),
+            "close": grouped["price"].last(),
+            "bid_high": grouped["bid"].max(),
+            "bid_low": grouped["bid"].min(),
+            "bid_close": grouped["bid"].last(),
+            "ask_high": grouped["ask"].max(),
+            "ask_low": grouped["ask"].min(),
+            "ask_close": grouped["ask"].last(),
+            "spread_min": grouped["spread"].min(),
+            "spread_max": grouped["spread"].max(),
+            "spread_sum": grouped["spread"].sum(),
+            "sample_count": grouped["spread"].count(),
+            "first_timestamp": grouped["timestamp"].min(),
+            "last_timestamp": grouped["timestamp"].max(),
+        })
+
+        rows = []
+        for bucket, row in rollups.iterrows():
+            rows.append((
+                coin_symbol,
+                bucket.to_pydatetime(),
+                *[float(row[column]) for column in ROLLUP_COLUMNS[2:15]],
+                int(row["sample_count"]),
+                row["first_timestamp"].to_pydatetime(),
+                row["last_timestamp"].to_pydatetime(),
+            ))
+        return rows
@@ -1,36 +1,119 @@
 import logging
 import uuid
+from decimal import Decimal, ROUND_DOWN, ROUND_UP
+
+# Used when a pair's increments can't be fetched: the precision order quantities are reported with
+DEFAULT_INCREMENT = Decimal("0.00000001")
+
 
 class ExchangeAPI:
     def __init__(self, client):
         self.client = client
+        self._increments = {}  # symbol -> (asset_increment, quote_increment)
+
+    def get_increments(self, coin):
+        """
+        Quantity and price steps of a trading pair, fetched once per symbol.
+        """
+        if coin in self._increments:
+            return self._increments[coin]
+        try:
+            response = self.client.get_trading_pairs(coin)
+            pair = response["results"][0]
+            increments = (Decimal(pair["asset_increment"]), Decimal(pair["quote_increment"]))
+        except Exception as e:
+            logging.warning(f"Trading pair increments unavailable for {coin}, using {DEFAULT_INCREMENT}: {e}")
+            return DEFAULT_INCREMENT, DEFAULT_INCREMENT
+        self._increments[coin] = increments
+        return increments
+
+    @staticmethod
+    def _round_to_increment(value, increment, rounding):
+        steps = (Decimal(str(value)) / increment).to_integral_value(rounding=rounding)
+        return format(steps * increment, "f")
 
     def place_order(self, order_type, coin, price, quantity, order_config=None):
         try:
             client_order_id = str(uuid.uuid4())
             side = "buy" if order_type == "buy" else "sell"
 
+            # The exchange rejects quantities/prices finer than the pair's increments. Quantities round
+            # down (never more than we can pay for or hold); prices round towards the other side of the
+            # book so the order stays marketable.
+            asset_increment, quote_increment = self.get_increments(coin)
+            asset_quantity = self._round_to_increment(quantity, asset_increment, ROUND_DOWN)
+            if Decimal(asset_quantity) <= 0:
+                logging.warning(f"{order_type.capitalize()} order for {coin} rounds to zero quantity ({quantity}).")
+                return None
+
             order_data = {
-                "asset_quantity": quantity,
-                "limit_price": price,
+                "asset_quantity": asset_quantity,
+                "limit_price": self._round_to_increment(price, quote_increment, ROUND_UP if side == "buy" else ROUND_DOWN),
                 "time_in_force": "gtc",
             }
 
             if order_config:
                 order_data.update(order_config)
 
-            return self.client.place_order(
+            response = self.client.place_order(
                 client_order_id=client_order_id,
                 side=side,
-                order_type=order_type,
+                order_type="limit",  # order_data is a limit order config; `order_type` here is the side
                 symbol=coin,
                 order_config=order_data,
             )
+            if not response or "id" not in response:
+                logging.warning(f"{order_type.capitalize()} order for {coin} was rejected: {response}")
+                return None
+            return response
         except Exception as e:
             logging.error(f"Error placing {order_type} order for {coin}: {e}", exc_info=True)
             return None
 
 
+    def get_order(self, order_id):
+        """
+        Fetch a single order by id.
+        """
+        try:
+            response = self.client.get_order(order_id)
+            if not response or "id" not in response:
+                logging.warning(f"No order data found for {order_id}: {response}")
+                return None
+            return response
+        except Exception as e:
+            logging.error(f"Error fetching order {order_id}: {e}", exc_info=True)
+            return None
+
+    def cancel_order(self, order_id):
+        """
+        Request cancellation of an open order.
+        :return: True if the exchange accepted the cancel request.
+        """
+        try:
+            response = self.client.cancel_order(order_id)
+            if response is None or (isinstance(response, dict) and "errors" in response):
+                logging.warning(f"Cancel request for {order_id} was rejected: {response}")
+                return False
+            return True
+        except Exception as e:
+            logging.error(f"Error cancelling order {order_id}: {e}", exc_info=True)
+            return False
+
+    def get_orders(self):
+        """
+        Fetch the account's orders (all symbols and states).
+        """
+        try:
+            response = self.client.get_orders()
+            if not response or "results" not in response:
+                logging.warning(f"No order data found: {response}")
+                return None
+            return response["results"]
+        except Exception as e:
+            logging.error(f"Error fetching orders: {e}", exc_info=True)
+            return None
+
     def get_executed_orders(self, symbol: str, last_timestamp: str = None) -> list:
         """
         Fetch executed orders for a specific symbol after a given timestamp.
@@ -13,7 +13,8 @@ class CryptoAPITrading:
         base64_key = os.getenv("BASE64_PRIVATE_KEY")
         private_key_seed = base64.b64decode(base64_key)
         self.private_key = SigningKey(private_key_seed)
-        self.base_url = "https://trading.robinhood.com"
+        # Overridable so the bot can be pointed at the local simulator (bot/exchange/simulator.py)
+        self.base_url = os.getenv("API_BASE_URL", "https://trading.robinhood.com")
 
     @staticmethod
     def _get_current_timestamp() -> int:
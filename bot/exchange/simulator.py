@@ -0,0 +1,550 @@
+"""
+Local stand-in for the Robinhood crypto trading API, for load and soak testing.
+
+Run it, then point the bot at it with API_BASE_URL (same API_KEY / BASE64_PRIVATE_KEY as the bot):
+
+    python -m bot.exchange.simulator --port 8080 --latency lognormal --latency-mean-ms 120 --throttle-rate 0.02
+    API_BASE_URL=http://127.0.0.1:8080 python main.py
+
+main.py still needs its MySQL database. tests/test_soak.py runs Bot against an in-process simulator
+with an in-memory stand-in for the database.
+"""
+import argparse
+import base64
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from nacl.exceptions import BadSignatureError
+from nacl.signing import SigningKey, VerifyKey
+
+ACCOUNT_NUMBER = "SIM0000001"
+OPEN_STATES = {"open", "partially_filled"}
+
+
+def _now_iso():
+    return datetime.now(tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+class LatencyModel:
+    def __init__(self, distribution="fixed", mean_ms=0.0, jitter_ms=0.0):
+        """
+        :param distribution: "fixed", "uniform" (mean +/- jitter) or "lognormal" (mean with jitter as std dev).
+        """
+        self.distribution = distribution
+        self.mean = mean_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+
+    def sample(self):
+        if self.mean <= 0:
+            return 0.0
+        if self.distribution == "uniform":
+            return max(0.0, random.uniform(self.mean - self.jitter, self.mean + self.jitter))
+        if self.distribution == "lognormal":
+            sigma = math.sqrt(math.log(1 + (self.jitter / self.mean) ** 2))
+            return random.lognormvariate(math.log(self.mean) - sigma ** 2 / 2, sigma)
+        return self.mean
+
+
+class RateLimiter:
+    def __init__(self, requests_per_second=0.0, throttle_rate=0.0):
+        """
+        :param requests_per_second: Token-bucket limit (0 disables).
+        :param throttle_rate: Probability of injecting a 429 regardless of the bucket.
+        """
+        self.rate = requests_per_second
+        self.throttle_rate = throttle_rate
+        self._tokens = requests_per_second
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def allow(self):
+        if self.throttle_rate and random.random() < self.throttle_rate:
+            return False
+        if not self.rate:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class SimulatedMarket:
+    """
+    Prices, account and order book for the simulator.
+    1. Every symbol follows a geometric random walk, advanced lazily from the time it was last observed.
+    2. Unknown symbols are listed on first request, so any `coins` list in config.ini works.
+    3. Market orders fill immediately; limit orders rest until the quote crosses the limit price.
+    4. Buying power and holdings are reserved while orders are open, like the real account.
+    5. Only open orders are matched (indexed by symbol); the newest `closed_order_limit` filled or
+       cancelled orders are kept for lookups and older ones are dropped.
+    6. Like the real API, orders with a quantity or limit price finer than the pair's increments are rejected.
+    """
+
+    def __init__(self, buying_power=100000.0, volatility=0.0005, spread_bps=10.0, partial_fill_ratio=1.0,
+                 closed_order_limit=10000, asset_increment="0.00000001", quote_increment="0.00000001"):
+        """
+        :param volatility: Per-second standard deviation of log returns.
+        :param spread_bps: Half-spread applied on each side of the mid price, in basis points.
+        :param partial_fill_ratio: Fraction of an order's remaining quantity filled per match (1.0 fills at once).
+        :param closed_order_limit: Number of filled/cancelled orders kept for get_order(...) / list_orders(...).
+        :param asset_increment: Smallest quantity step of every pair, as listed by the trading pairs endpoint.
+        :param quote_increment: Smallest price step of every pair.
+        """
+        self.volatility = volatility
+        self.spread = spread_bps / 10000.0
+        self.partial_fill_ratio = partial_fill_ratio
+        self.buying_power = buying_power
+        self.holdings = {}  # asset_code -> {"total": float, "reserved": float}
+        self.closed_order_limit = closed_order_limit
+        self.asset_increment = Decimal(asset_increment)
+        self.quote_increment = Decimal(quote_increment)
+        self.orders = {}  # order id -> order dict (API shape)
+        self._open_by_symbol = {}  # symbol -> {order id: order} for orders that can still fill
+        self._closed = deque()  # ids of filled/cancelled orders, oldest first
+        self._prices = {}  # symbol -> (mid price, last update monotonic)
+        self._lock = threading.RLock()
+
+    # 1. Prices
+    def _mid(self, symbol):
+        now = time.monotonic()
+        if symbol not in self._prices:
+            self._prices[symbol] = (math.exp(random.uniform(math.log(0.01), math.log(50000))), now)
+        price, updated = self._prices[symbol]
+        dt = now - updated
+        if dt > 0:
+            sigma = self.volatility * math.sqrt(dt)
+            price *= math.exp(random.gauss(-sigma ** 2 / 2, sigma))
+            self._prices[symbol] = (price, now)
+        return price
+
+    def quote(self, symbol):
+        with self._lock:
+            mid = self._mid(symbol)
+            self._match(symbol, mid)
+            return {
+                "symbol": symbol,
+                "price": f"{mid:.8f}",
+                "bid_inclusive_of_sell_spread": f"{mid * (1 - self.spread):.8f}",
+                "sell_spread": f"{self.spread:.6f}",
+                "ask_inclusive_of_buy_spread": f"{mid * (1 + self.spread):.8f}",
+                "buy_spread": f"{self.spread:.6f}",
+                "timestamp": _now_iso(),
+            }
+
+    def symbols(self):
+        with self._lock:
+            return list(self._prices)
+
+    def trading_pair(self, symbol):
+        return {
+            "asset_code": symbol.replace("-USD", ""),
+            "quote_code": "USD",
+            "asset_increment": str(self.asset_increment),
+            "quote_increment": str(self.quote_increment),
+            "max_order_size": "1000000000",
+            "min_order_size": str(self.asset_increment),
+            "status": "tradable",
+            "symbol": symbol,
+        }
+
+    # 2. Account
+    def account(self):
+        with self._lock:
+            return {
+                "account_number": ACCOUNT_NUMBER,
+                "status": "active",
+                "buying_power": f"{self.buying_power:.2f}",
+                "buying_power_currency": "USD",
+            }
+
+    def holdings_list(self, asset_codes=None):
+        with self._lock:
+            return [
+                {
+                    "account_number": ACCOUNT_NUMBER,
+                    "asset_code": asset_code,
+                    "total_quantity": f"{holding['total']:.8f}",
+                    "quantity_available_for_trading": f"{holding['total'] - holding['reserved']:.8f}",
+                }
+                for asset_code, holding in self.holdings.items()
+                if holding["total"] > 0 and (not asset_codes or asset_code in asset_codes)
+            ]
+
+    # 3. Orders
+    def place_order(self, body):
+        """
+        :return: (order, error message). Exactly one of them is None.
+        """
+        side = body.get("side")
+        order_type = body.get("type")
+        symbol = body.get("symbol")
+        config = body.get(f"{order_type}_order_config")
+
+        if side not in ("buy", "sell"):
+            return None, f"Invalid side '{side}'."
+        if order_type not in ("market", "limit") or not isinstance(config, dict):
+            return None, f"Unsupported order type '{order_type}' (expected market or limit with a matching config)."
+        if not symbol or not symbol.endswith("-USD"):
+            return None, f"Invalid symbol '{symbol}'."
+
+        try:
+            quantity = Decimal(str(config["asset_quantity"]))
+            limit_price = Decimal(str(config["limit_price"])) if order_type == "limit" else None
+        except (KeyError, TypeError, InvalidOperation) as e:
+            return None, f"Invalid order config: {e}"
+        if quantity <= 0:
+            return None, "asset_quantity must be positive."
+        if quantity % self.asset_increment:
+            return None, f"asset_quantity {quantity} is finer than the {symbol} asset increment {self.asset_increment}."
+        if limit_price is not None and limit_price % self.quote_increment:
+            return None, f"limit_price {limit_price} is finer than the {symbol} quote increment {self.quote_increment}."
+        quantity = float(quantity)
+        limit_price = float(limit_price) if limit_price is not None else None
+
+        with self._lock:
+            mid = self._mid(symbol)
+            reserve_price = limit_price if limit_price is not None else mid * (1 + self.spread)
+            asset_code = symbol.replace("-USD", "")
+            holding = self.holdings.setdefault(asset_code, {"total": 0.0, "reserved": 0.0})
+
+            if side == "buy":
+                if reserve_price * quantity > self.buying_power:
+                    return None, "Insufficient buying power."
+                self.buying_power -= reserve_price * quantity
+            else:
+                if quantity > holding["total"] - holding["reserved"]:
+                    return None, "Insufficient holdings."
+                holding["reserved"] += quantity
+
+            now = _now_iso()
+            order = {
+                "id": str(uuid.uuid4()),
+                "account_number": ACCOUNT_NUMBER,
+                "symbol": symbol,
+                "client_order_id": body.get("client_order_id"),
+                "side": side,
+                "executions": [],
+                "type": order_type,
+                "state": "open",
+                "average_price": None,
+                "filled_asset_quantity": "0.00000000",
+                "created_at": now,
+                "updated_at": now,
+                f"{order_type}_order_config": config,
+                "_quantity": quantity,
+                "_filled": 0.0,
+                "_notional": 0.0,
+                "_reserve_price": reserve_price,
+            }
+            self.orders[order["id"]] = order
+            self._open_by_symbol.setdefault(symbol, {})[order["id"]] = order
+            self._match(symbol, mid)
+            return order, None
+
+    def cancel_order(self, order_id):
+        with self._lock:
+            order = self.orders.get(order_id)
+            if order is None:
+                return False, "Order not found."
+            if order["state"] not in OPEN_STATES:
+                return False, f"Order is {order['state']}."
+            self._release(order)
+            order["state"] = "canceled"
+            order["updated_at"] = _now_iso()
+            self._close(order)
+            return True, None
+
+    def get_order(self, order_id):
+        with self._lock:
+            order = self.orders.get(order_id)
+            return public_order(order) if order is not None else None
+
+    def list_orders(self, symbol=None, created_at_start=None, state=None):
+        with self._lock:
+            return [
+                public_order(order) for order in self.orders.values()
+                if (not symbol or order["symbol"] == symbol)
+                and (not created_at_start or order["created_at"] >= created_at_start)
+                and (not state or order["state"] == state)
+            ]
+
+    def open_symbols(self):
+        with self._lock:
+            return set(self._open_by_symbol)
+
+    # 4. Matching engine
+    def _match(self, symbol, mid):
+        bid, ask = mid * (1 - self.spread), mid * (1 + self.spread)
+        for order in list(self._open_by_symbol.get(symbol, {}).values()):
+            limit_price = order["_reserve_price"] if order["type"] == "limit" else None
+            if order["side"] == "buy":
+                if limit_price is not None and ask > limit_price:
+                    continue
+                fill_price = ask
+            else:
+                if limit_price is not None and bid < limit_price:
+                    continue
+                fill_price = bid
+
+            remaining = order["_quantity"] - order["_filled"]
+            fill_quantity = remaining if order["type"] == "market" else remaining * self.partial_fill_ratio
+            if remaining - fill_quantity < 1e-12:
+                fill_quantity = remaining
+            self._fill(order, fill_quantity, fill_price)
+
+    def _fill(self, order, quantity, price):
+        holding = self.holdings[order["symbol"].replace("-USD", "")]
+        if order["side"] == "buy":
+            # Reservation was taken at the limit (or ask at placement); refund any price improvement
+            self.buying_power += (order["_reserve_price"] - price) * quantity
+            holding["total"] += quantity
+        else:
+            holding["reserved"] -= quantity
+            holding["total"] -= quantity
+            self.buying_power += price * quantity
+
+        now = _now_iso()
+        order["_filled"] += quantity
+        order["_notional"] += price * quantity
+        order["executions"].append({"effective_price": f"{price:.8f}", "quantity": f"{quantity:.8f}", "timestamp": now})
+        order["filled_asset_quantity"] = f"{order['_filled']:.8f}"
+        order["average_price"] = f"{order['_notional'] / order['_filled']:.8f}"
+        order["state"] = "filled" if order["_quantity"] - order["_filled"] < 1e-12 else "partially_filled"
+        order["updated_at"] = now
+        if order["state"] == "filled":
+            self._close(order)
+
+    def _close(self, order):
+        open_orders = self._open_by_symbol[order["symbol"]]
+        del open_orders[order["id"]]
+        if not open_orders:
+            del self._open_by_symbol[order["symbol"]]
+
+        self._closed.append(order["id"])
+        while len(self._closed) > self.closed_order_limit:
+            self.orders.pop(self._closed.popleft(), None)
+
+    def _release(self, order):
+        remaining = order["_quantity"] - order["_filled"]
+        if order["side"] == "buy":
+            self.buying_power += order["_reserve_price"] * remaining
+        else:
+            self.holdings[order["symbol"].replace("-USD", "")]["reserved"] -= remaining
+
+    def step(self):
+        """
+        Advance prices and match resting orders for every symbol with open orders.
+        """
+        for symbol in self.open_symbols():
+            self.quote(symbol)
+
+
+def public_order(order):
+    return {key: value for key, value in order.items() if not key.startswith("_")}
+
+
+class SimulatedExchangeHandler(BaseHTTPRequestHandler):
+    market = None
+    latency = LatencyModel()
+    limiter = RateLimiter()
+    api_key = None
+    verify_key = None
+    max_clock_skew = 30
+
+    def log_message(self, format, *args):
+        logging.debug("%s - %s", self.address_string(), format % args)
+
+    def _send(self, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status, detail, headers=None):
+        error_type = "client_error" if status < 500 else "server_error"
+        self._send(status, {"type": error_type, "errors": [{"detail": detail}]}, headers)
+
+    def _authenticate(self, method, body):
+        """
+        Verify the headers produced by CryptoAPITrading.get_authorization_header(...).
+        """
+        api_key = self.headers.get("x-api-key")
+        signature = self.headers.get("x-signature")
+        timestamp = self.headers.get("x-timestamp")
+        if not api_key or not signature or not timestamp:
+            return "Missing authentication headers."
+        if self.api_key and api_key != self.api_key:
+            return "Unknown API key."
+        try:
+            if abs(time.time() - int(timestamp)) > self.max_clock_skew:
+                return "Timestamp outside of the allowed window."
+            message = f"{api_key}{timestamp}{self.path}{method}{body}".encode("utf-8")
+            self.verify_key.verify(message, base64.b64decode(signature))
+        except (ValueError, BadSignatureError):
+            return "Invalid signature."
+        return None
+
+    def _handle(self, method):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode("utf-8") if length else ""
+
+        time.sleep(self.latency.sample())
+
+        if not self.limiter.allow():
+            self._error(429, "Request was throttled.", {"Retry-After": "1"})
+            return
+
+        auth_error = self._authenticate(method, body)
+        if auth_error:
+            self._error(401, auth_error)
+            return
+
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        parts = [part for part in url.path.split("/") if part]
+        route = "/".join(parts[:4])  # e.g. api/v1/crypto/trading
+        resource = parts[4:]
+
+        try:
+            if method == "GET" and route == "api/v1/crypto/trading" and resource == ["accounts"]:
+                self._send(200, self.market.account())
+            elif method == "GET" and route == "api/v1/crypto/trading" and resource == ["holdings"]:
+                self._send(200, {"next": None, "previous": None,
+                                 "results": self.market.holdings_list(query.get("asset_code"))})
+            elif method == "GET" and route == "api/v1/crypto/trading" and resource == ["trading_pairs"]:
+                symbols = query.get("symbol") or self.market.symbols()
+                self._send(200, {"next": None, "previous": None,
+                                 "results": [self.market.trading_pair(symbol) for symbol in symbols]})
+            elif method == "GET" and route == "api/v1/crypto/marketdata" and resource == ["best_bid_ask"]:
+                symbols = query.get("symbol") or self.market.symbols()
+                self._send(200, {"results": [self.market.quote(symbol) for symbol in symbols]})
+            elif method == "GET" and route == "api/v1/crypto/trading" and resource == ["orders"]:
+                orders = self.market.list_orders(
+                    symbol=(query.get("symbol") or [None])[0],
+                    created_at_start=(query.get("created_at_start") or [None])[0],
+                    state=(query.get("state") or [None])[0],
+                )
+                self._send(200, {"next": None, "previous": None, "results": orders})
+            elif method == "GET" and route == "api/v1/crypto/trading" and len(resource) == 2 and resource[0] == "orders":
+                order = self.market.get_order(resource[1])
+                if order is None:
+                    self._error(404, "Order not found.")
+                else:
+                    self._send(200, order)
+            elif method == "POST" and route == "api/v1/crypto/trading" and resource == ["orders"]:
+                order, error = self.market.place_order(json.loads(body or "{}"))
+                if error:
+                    self._error(400, error)
+                else:
+                    self._send(201, self.market.get_order(order["id"]))
+            elif method == "POST" and route == "api/v1/crypto/trading" and len(resource) == 3 \
+                    and resource[0] == "orders" and resource[2] == "cancel":
+                cancelled, error = self.market.cancel_order(resource[1])
+                if error:
+                    self._error(400, error)
+                else:
+                    self._send(200, {})
+            else:
+                self._error(404, f"No route for {method} {url.path}")
+        except json.JSONDecodeError:
+            self._error(400, "Body is not valid JSON.")
+        except Exception as e:
+            logging.error(f"Error handling {method} {self.path}: {e}", exc_info=True)
+            self._error(500, "Internal simulator error.")
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+
+def build_server(host, port, market, verify_key, api_key=None, latency=None, limiter=None):
+    handler = type("ConfiguredHandler", (SimulatedExchangeHandler,), {
+        "market": market,
+        "verify_key": verify_key,
+        "api_key": api_key,
+        "latency": latency or LatencyModel(),
+        "limiter": limiter or RateLimiter(),
+    })
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulated Robinhood crypto exchange for load/soak testing.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--api-key", default=os.getenv("API_KEY"), help="Expected x-api-key (default: $API_KEY).")
+    parser.add_argument("--public-key", help="Base64 ed25519 public key. Default: derived from $BASE64_PRIVATE_KEY.")
+    parser.add_argument("--latency", choices=["fixed", "uniform", "lognormal"], default="fixed")
+    parser.add_argument("--latency-mean-ms", type=float, default=0.0)
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Requests per second before 429s (0 = off).")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Probability of a random 429.")
+    parser.add_argument("--buying-power", type=float, default=100000.0)
+    parser.add_argument("--volatility", type=float, default=0.0005, help="Per-second log-return std dev.")
+    parser.add_argument("--spread-bps", type=float, default=10.0)
+    parser.add_argument("--partial-fill-ratio", type=float, default=1.0)
+    parser.add_argument("--asset-increment", default="0.00000001", help="Quantity step orders must respect.")
+    parser.add_argument("--quote-increment", default="0.00000001", help="Limit price step orders must respect.")
+    parser.add_argument("--match-interval", type=float, default=0.5, help="Seconds between matching passes.")
+    parser.add_argument("--seed", type=int, help="Random seed for reproducible runs.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    if args.public_key:
+        verify_key = VerifyKey(base64.b64decode(args.public_key))
+    elif os.getenv("BASE64_PRIVATE_KEY"):
+        verify_key = SigningKey(base64.b64decode(os.getenv("BASE64_PRIVATE_KEY"))).verify_key
+    else:
+        parser.error("Provide --public-key or set BASE64_PRIVATE_KEY.")
+
+    market = SimulatedMarket(
+        args.buying_power, args.volatility, args.spread_bps, args.partial_fill_ratio,
+        asset_increment=args.asset_increment, quote_increment=args.quote_increment,
+    )
+    server = build_server(
+        args.host, args.port, market, verify_key, args.api_key,
+        LatencyModel(args.latency, args.latency_mean_ms, args.latency_jitter_ms),
+        RateLimiter(args.rate_limit, args.throttle_rate),
+    )
+
+    def match_forever():
+        while True:
+            time.sleep(args.match_interval)
+            market.step()
+
+    threading.Thread(target=match_forever, name="matcher", daemon=True).start()
+    logging.info(f"Simulated exchange listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+from .registry import Feature, FeatureRegistry, build_default_registry
@@ -0,0 +1,162 @@
+import logging
+from graphlib import CycleError, TopologicalSorter
+
+import pandas as pd
+
+BID = "bid_inclusive_of_sell_spread"
+ASK = "ask_inclusive_of_buy_spread"
+
+
+class Feature:
+    def __init__(self, name, inputs, compute, window=None):
+        """
+        :param name: Column name the feature is stored under.
+        :param inputs: Base columns or other feature names the feature reads.
+        :param compute: Callable taking the frame (with all inputs present) and returning a Series.
+        :param window: Rows of history needed (int) or a pandas time offset such as "15min". Values on rows
+                       without a full window of history before them are NaN.
+        """
+        if isinstance(window, str) and "timestamp" not in inputs:
+            raise ValueError(f"Feature '{name}' has a time window but doesn't read 'timestamp'.")
+        if isinstance(window, int) and window < 1:
+            raise ValueError(f"Feature '{name}' window must be at least one row, got {window}.")
+        self.name = name
+        self.inputs = list(inputs)
+        self.compute = compute
+        self.window = window
+
+
+class FeatureRegistry:
+    """
+    Single place where per-symbol features are declared and computed.
+    1. Each feature declares its inputs and window; the registry orders them as a dependency DAG
+       and leaves a feature NaN wherever the frame doesn't hold its full window of history.
+    2. Within a tick each feature is computed at most once per symbol and memoized.
+    3. Strategies, persistence and model inference read the same cached frame.
+    Frames are cached per (symbol, history length); supplying a different frame for a cached key
+    within the same tick raises instead of silently returning the cached one.
+    """
+
+    def __init__(self):
+        self._features = {}
+        self._order = None
+        self._cache = {}  # (symbol, length) -> DataFrame with the features computed so far this tick
+        self.tick = 0
+
+    def add(self, feature):
+        if feature.name in self._features:
+            raise ValueError(f"Feature '{feature.name}' is already registered.")
+        self._features[feature.name] = feature
+        self._order = None
+
+    def _topological_order(self):
+        if self._order is None:
+            graph = {
+                name: [dep for dep in feature.inputs if dep in self._features]
+                for name, feature in self._features.items()
+            }
+            try:
+                self._order = list(TopologicalSorter(graph).static_order())
+            except CycleError as e:
+                raise ValueError(f"Feature dependency cycle: {e.args[1]}") from e
+        return self._order
+
+    def _dependencies(self, names):
+        needed = set()
+        stack = list(names)
+        while stack:
+            name = stack.pop()
+            if name in needed:
+                continue
+            if name not in self._features:
+                raise KeyError(f"Unknown feature '{name}'.")
+            needed.add(name)
+            stack.extend(dep for dep in self._features[name].inputs if dep in self._features)
+        return needed
+
+    def begin_tick(self):
+        """
+        Drop all memoized features. Called by Bot at the start of every tick.
+        """
+        self.tick += 1
+        self._cache.clear()
+
+    def cached(self, symbol, length):
+        return self._cache.get((symbol, length))
+
+    def compute(self, symbol, frame, features=None, length=None):
+        """
+        Return the symbol's frame with the requested features (default: all) added.
+        Features already computed for this symbol and length in the current tick are reused, not recomputed.
+        :param length: History length the frame was loaded for (defaults to its row count). A query for
+                       `length` rows may return fewer, so callers loading from the DB pass what they asked for.
+        """
+        needed = self._dependencies(features if features is not None else self._features)
+
+        key = (symbol, len(frame) if length is None else length)
+        df = self._cache.get(key)
+        if df is None:
+            df = frame.copy()
+            self._cache[key] = df
+        elif frame is not df and not self._same_rows(frame, df):
+            raise ValueError(
+                f"Frame for {symbol} (length {key[1]}) differs from the one cached in tick {self.tick}; "
+                f"call begin_tick() before computing features on new data."
+            )
+
+        for name in self._topological_order():
+            if name not in needed or name in df.columns:
+                continue
+            feature = self._features[name]
+            missing = [column for column in feature.inputs if column not in df.columns]
+            if missing:
+                raise KeyError(f"Feature '{name}' for {symbol} is missing inputs {missing}.")
+            df[name] = self._within_window(df, feature.compute(df), feature.window)
+            logging.debug(f"Computed feature {name} for {symbol} (tick {self.tick}).")
+
+        return df
+
+    @staticmethod
+    def _same_rows(frame, cached):
+        if len(frame) != len(cached):
+            return False
+        if len(frame) == 0 or "timestamp" not in frame.columns:
+            return True
+        return frame["timestamp"].iloc[-1] == cached["timestamp"].iloc[-1]
+
+    @staticmethod
+    def _within_window(df, values, window):
+        # Blank out rows that don't have the feature's full window of history behind them
+        if window is None or df.empty:
+            return values
+        if isinstance(window, int):
+            covered = pd.Series(range(len(df)), index=df.index) >= window - 1
+        else:
+            covered = df["timestamp"] - df["timestamp"].iloc[0] >= pd.Timedelta(window)
+        return values.where(covered)
+
+
+def build_default_registry():
+    """
+    Registry with the features previously spread over ValueHistoryManager and ScalpingStrategy.
+    """
+    registry = FeatureRegistry()
+
+    registry.add(Feature("spread", [ASK, BID], lambda df: df[ASK] - df[BID]))
+    registry.add(Feature("price_change", [BID], lambda df: df[BID].pct_change(), window=2))
+    registry.add(Feature("momentum", [BID], lambda df: df[BID] - df[BID].shift(5), window=6))
+    registry.add(Feature("volatility", [BID], lambda df: df[BID].rolling(window=10).std(), window=10))
+
+    for minutes in (1, 3, 5, 15):
+        registry.add(Feature(
+            f"avg_{minutes}min",
+            ["timestamp", BID],
+            lambda df, offset=f"{minutes}min": df.rolling(offset, on="timestamp")[BID].mean(),
+            window=f"{minutes}min",
+        ))
+
+    registry.add(Feature("gap_1_3", ["avg_1min", "avg_3min"], lambda df: df["avg_3min"] - df["avg_1min"]))
+    registry.add(Feature("gap_3_5", ["avg_3min", "avg_5min"], lambda df: df["avg_5min"] - df["avg_3min"]))
+    registry.add(Feature("gap_5_15", ["avg_5min", "avg_15min"], lambda df: df["avg_15min"] - df["avg_5min"]))
+
+    return registry
@@ -1,92 +1,86 @@
+import logging
+
+
 class ScalpingData:
+    def __init__(self, ledger):
+        """
+        :param ledger: PortfolioLedger shared with Bot.
+        """
+        self.ledger = ledger
 
     # 1. Get current bid/ask values for all coins from API (1st API call)
-    def __get_coin_values(self) -> dict:
+    def __get_coin_values(self, api, coins) -> dict:
         coin_data = api.get_best_price(coins)
         return coin_data
 
     # 2. Store current values in the database
-    def __set_coin_values(self, all_coin_data) -> bool:
+    def __set_coin_values(self, db_manager, all_coin_data) -> bool:
         try:
-            db_manager.value_history.insert_data(all_coin_data)
+            db_manager.value_history.insert_data(all_coin_data["results"])
             return True
         except Exception as e:
             logging.error(f"Error setting coin values: {e}", exc_info=True)
             return False
 
     # 3. Get the most recent `n` values from the database
-    def __get_value_history(self, coin_symbol, length) -> dict:
+    def __get_value_history(self, db_manager, coin_symbol, length) -> dict:
         return db_manager.value_history.get_value_history(coin_symbol, length)
 
-    # 4. Get current holdings from API (2nd API call)
-    def __get_holdings(self) -> dict:
-        holdings = api.get_holdings()
-        if not holdings:
-            logging.warning("No holdings data found.")
-        return holdings
+    # 4. Current holdings from the ledger (no API call - Bot seeds it once and fills keep it current)
+    def __get_holdings(self) -> list:
+        return self.ledger.holdings()
 
-    # 5. Get current buying power from API (3rd API call)
-    def __get_buying_power(self) -> float:
-        buying_power = api.get_account()
-        if not buying_power:
-            logging.error("Error fetching buying power. API returned None.")
-            return 0.0
-        return float(buying_power)
+    # 5. Average spread per coin over the long horizon, read from the rollup tables (one query per tick)
+    def __get_average_spreads(self, db_manager, config, coins) -> dict:
+        try:
+            rollups = db_manager.value_history.get_rollup_history(
+                coins,
+                config.get("DEFAULT", "rollup_interval", fallback="1h"),
+                config.getint("DEFAULT", "rollup_history_length", fallback=24),
+            )
+        except Exception as e:
+            logging.error(f"Error fetching rollup history: {e}", exc_info=True)
+            return {}
 
-    # 6. Compute "true buying power" by including portfolio holdings
-    def __true_buying_power(self, holdings, coin_symbol) -> float:
+        totals = rollups.groupby("symbol")[["spread_sum", "sample_count"]].sum()
+        return (totals["spread_sum"] / totals["sample_count"]).to_dict()
+
+    # 6. Compute "true buying power" from the portfolio ledger
+    def __true_buying_power(self) -> float:
         """
-        Calculate true buying power by adding the total holdings value in USD to cash balance.
+        Allocation for a single trade (2% of total portfolio value).
+        Read from the ledger, which is kept current from fills and the tick's price snapshot.
         """
-        cash = __get_buying_power()
-        total_holdings_value_usd = 0.0
-
-        if isinstance(holdings, dict):
-            holdings_list = holdings.get("results", [])
-        else:
-            holdings_list = holdings
+        return self.ledger.allocation()
 
-        for holding in holdings_list:
-            asset_code = holding["asset_code"]
-            quantity_held = float(holding["total_quantity"])
+    # 7. Snapshot shared by every coin in this tick (bid/ask for all coins stored once + ledger holdings)
+    def compile_data(self, api, db_manager, config, coins) -> dict:
+        all_coin_data = self.__get_coin_values(api, coins)
+        if not all_coin_data or "results" not in all_coin_data:
+            return all_coin_data
 
-            if quantity_held > 0:
-                pair_symbol = f"{asset_code}-USD"
-                price_data = api.get_best_price([pair_symbol])
+        self.__set_coin_values(db_manager, all_coin_data)
+        all_coin_data["holdings"] = self.__get_holdings()
+        all_coin_data["average_spreads"] = self.__get_average_spreads(db_manager, config, coins)
+        return all_coin_data
 
-                if price_data and "results" in price_data and price_data["results"]:
-                    price_info = next((item for item in price_data["results"] if item["symbol"] == pair_symbol), None)
-                    if price_info:
-                        adjusted_ask_price = float(price_info["ask_inclusive_of_buy_spread"])
-                        total_holdings_value_usd += quantity_held * adjusted_ask_price
-
-        total_portfolio_value_usd = total_holdings_value_usd + cash
-        allocation = 0.02 * total_portfolio_value_usd  # Allocates 2% of total portfolio value
-
-        return allocation
-
-    # 7. Compile data necessary for strategy execution
-    def compile_data(self, coin_symbol) -> dict:
-        compiled_data = {
+    # 8. Compile data necessary for strategy execution of one coin
+    def compile_coin_data(self, api, db_manager, config, all_coin_data, price_info) -> dict:
+        """
+        :param all_coin_data: Snapshot returned by compile_data(...) for this tick.
+        :param price_info: The snapshot's best bid/ask entry for the coin.
+        """
+        coin_symbol = price_info["symbol"]
+        return {
             "symbol": coin_symbol,
-            "value_history": __get_value_history(coin_symbol, config.get("DEFAULT", "coin_history_length")),
-            "holdings": __get_holdings(),
+            "value_history": self.__get_value_history(
+                db_manager, coin_symbol, config.getint("DEFAULT", "coin_history_length")
+            ),
+            "holdings": all_coin_data["holdings"],
+            "buying_power": self.__true_buying_power(),
+            "average_spread": all_coin_data["average_spreads"].get(coin_symbol),
+            "price_data": {
+                "bid_price": price_info["bid_inclusive_of_sell_spread"],
+                "ask_price": price_info["ask_inclusive_of_buy_spread"],
+            },
         }
-        compiled_data["buying_power"] = __true_buying_power(compiled_data["holdings"], coin_symbol)
-
-        # Fetch bid/ask prices (previously done multiple times, now centralized)
-        price_data = api.get_best_price([coin_symbol])
-        if price_data and "results" in price_data and price_data["results"]:
-            price_info = next((item for item in price_data["results"] if item["symbol"] == coin_symbol), None)
-            if price_info:
-                compiled_data["price_data"] = {
-                    "bid_price": price_info["bid_inclusive_of_sell_spread"],
-                    "ask_price": price_info["ask_inclusive_of_buy_spread"]
-                }
-            else:
-                logging.warning(f"No price data found for {coin_symbol}.")
-        else:
-            logging.warning(f"Invalid price data response for {coin_symbol}: {price_data}")
-            compiled_data["price_data"] = None
-
-        return compiled_data
\ No newline at end of file
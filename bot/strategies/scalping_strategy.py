@@ -4,6 +4,16 @@ from decimal import Decimal
 from bot.strategies.strategy import TradingStrategy
 
 class ScalpingStrategy(TradingStrategy):
+    def __init__(self, take_profit="1.01", stop_loss="0.99", min_trade_prob="0.50"):
+        """
+        :param take_profit: Sell once bid >= last purchase price * take_profit.
+        :param stop_loss: Sell once bid <= last purchase price * stop_loss.
+        :param min_trade_prob: Minimum estimated probability required to buy.
+        """
+        self.take_profit = Decimal(take_profit)
+        self.stop_loss = Decimal(stop_loss)
+        self.min_trade_prob = Decimal(min_trade_prob)
+
     def execute_strategy(self, compiled_data):
         """
         Executes the scalping strategy using compiled market data.
@@ -15,6 +25,8 @@ class ScalpingStrategy(TradingStrategy):
             buying_power = Decimal(compiled_data.get("buying_power", 0.0))
             coin = compiled_data.get("symbol", None)
             price_data = compiled_data.get("price_data", None)
+            ledger = compiled_data.get("ledger", None)
+            order_tracker = compiled_data.get("order_tracker", None)
 
             if not coin:
                 logging.warning("No valid coin symbol found in compiled_data.")
@@ -39,40 +51,53 @@ class ScalpingStrategy(TradingStrategy):
                 logging.warning(f"Insufficient value history for {coin}")
                 return
 
-            # Compute gap values dynamically
-            if "gap_1_3" not in value_history.columns:
-                logging.warning("Gaps missing, computing them on the fly.")
-                value_history["gap_1_3"] = value_history["avg_3min"] - value_history["avg_1min"]
-                value_history["gap_3_5"] = value_history["avg_5min"] - value_history["avg_3min"]
-                value_history["gap_5_15"] = value_history["avg_15min"] - value_history["avg_5min"]
+            # Gap features come from the shared registry (computed once per tick for all consumers)
+            gap_columns = ["gap_1_3", "gap_3_5", "gap_5_15"]
+            features = compiled_data.get("features", None)
+            if "gap_1_3" not in value_history.columns and features is not None:
+                value_history = features.compute(coin, value_history, gap_columns)
 
             latest_data = value_history.iloc[-1]
-            gap_1_3 = Decimal(latest_data["gap_1_3"])
-            gap_3_5 = Decimal(latest_data["gap_3_5"])
-            gap_5_15 = Decimal(latest_data["gap_5_15"])
+            if not set(gap_columns) <= set(value_history.columns) or np.isnan(latest_data[gap_columns].astype(float)).any():
+                # No feature registry, or less than 15 minutes of history: no entry signal, but exits below still run
+                logging.debug(f"Gap features unavailable for {coin}.")
+                expected_return = 0.0
+            else:
+                gap_1_3 = Decimal(latest_data["gap_1_3"])
+                gap_3_5 = Decimal(latest_data["gap_3_5"])
+                gap_5_15 = Decimal(latest_data["gap_5_15"])
 
-            # Compute probability of a profitable trade
-            expected_return = self.estimate_trade_probability(gap_1_3, gap_3_5, gap_5_15)
+                # Compute probability of a profitable trade
+                expected_return = self.estimate_trade_probability(gap_1_3, gap_3_5, gap_5_15)
 
             # Determine trade size based on expected return
             trade_quantity = self.determine_trade_size(buying_power, ask_price, expected_return)
 
-            # **SELL STRATEGY**: Take profit if price increased > 1%
-            if self.already_holds_coin(holdings, coin):
-                last_purchase_price = self.get_last_buy_price(holdings, coin)
+            # **SELL STRATEGY**: Take profit / stop loss relative to the last purchase price
+            if ledger is not None:
+                holds_coin = ledger.holds(coin)
+                last_purchase_price = ledger.last_purchase_price(coin)
+                last_purchase_price = Decimal(str(last_purchase_price)) if last_purchase_price else None
+            else:
+                holds_coin = self.already_holds_coin(holdings, coin)
+                last_purchase_price = self.get_last_buy_price(holdings, coin) if holds_coin else None
+
+            if holds_coin:
+                # Exit the whole position this strategy holds (not a size derived from buying power)
+                sell_quantity = Decimal(str(ledger.quantity(coin))) if ledger is not None else trade_quantity
                 if last_purchase_price:
-                    if bid_price >= last_purchase_price * Decimal("1.01"):  # Take profit at 1% gain
-                        self.execute_trade(api, coin, bid_price, trade_quantity, "sell")
+                    if bid_price >= last_purchase_price * self.take_profit:  # Take profit
+                        self.execute_trade(api, coin, bid_price, sell_quantity, "sell", order_tracker)
                         return
-                    elif bid_price <= last_purchase_price * Decimal("0.99"):  # Stop-loss at 1% loss
-                        self.execute_trade(api, coin, bid_price, trade_quantity, "sell")
+                    elif bid_price <= last_purchase_price * self.stop_loss:  # Stop-loss
+                        self.execute_trade(api, coin, bid_price, sell_quantity, "sell", order_tracker)
                         return
                 logging.info(f"Skipping trade: Already holding {coin} and conditions not met.")
                 return
 
             # **BUY STRATEGY**: Execute only if expected return is favorable
             if trade_quantity > 0:
-                self.execute_trade(api, coin, ask_price, trade_quantity, "buy")
+                self.execute_trade(api, coin, ask_price, trade_quantity, "buy", order_tracker)
             else:
                 logging.info(f"No valid trade opportunity for {coin}. Probability not favorable.")
 
@@ -125,10 +150,8 @@ class ScalpingStrategy(TradingStrategy):
         """
         Determine the optimal trade size based on probability.
         """
-        min_trade_prob = Decimal("0.50")
-
-        if probability > min_trade_prob:
-            risk_factor = probability
+        if probability > self.min_trade_prob:
+            risk_factor = Decimal(str(probability))  # probability is a float; buying power a Decimal
             trade_size = buying_power * risk_factor
             trade_quantity = trade_size / ask_price  # Convert to coin quantity
 
@@ -136,9 +159,9 @@ class ScalpingStrategy(TradingStrategy):
         else:
             return Decimal("0")  # Do not trade if probability is too low
 
-    def execute_trade(self, api, coin, price, quantity, order_type):
+    def execute_trade(self, api, coin, price, quantity, order_type, order_tracker=None):
         """
-        Execute a buy/sell order.
+        Execute a buy/sell order and hand it to the order tracker (if any) for fill polling.
         """
         try:
             order_response = api.place_order(
@@ -149,6 +172,8 @@ class ScalpingStrategy(TradingStrategy):
             )
             if order_response:
                 logging.info(f"Trade executed: {order_type.capitalize()} {quantity} {coin} at {price}")
+                if order_tracker is not None:
+                    order_tracker.register(order_response)
             else:
                 logging.warning(f"Trade execution failed for {coin}")
         except Exception as e:
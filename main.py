@@ -2,13 +2,19 @@ import logging
 import os
 import json
 import time
+from datetime import timedelta
 from dotenv import load_dotenv
 from bot.strategies import ScalpingStrategy
 from bot.strategies.scalping_helpers import ScalpingData
 from bot.strategies.scalping_helpers import TradeDecision
 from bot.exchange import ExchangeAPI
 from bot.database import DatabaseManager
+from bot.features import build_default_registry
 from bot.core.bot import Bot
+from bot.core.portfolio import PortfolioLedger
+from bot.core.order_tracker import OrderTracker
+from bot.core.strategy_runner import StrategyRunner
+from bot.core.value_history_compactor import ValueHistoryCompactor
 from bot.exchange import robinhood
 from mysql.connector import connect
 from sklearn.ensemble import RandomForestClassifier
@@ -47,32 +53,72 @@ def main():
     config, log_file = setup_environment()
     logger = setup_logging(log_file)
 
-    # Initialize database connection
+    # Initialize database connections (the order tracker and compactor run in their own threads and need their own)
     connection = connect(
         host=os.getenv("DB_HOST"),
         user=os.getenv("DB_USER"),
         password=os.getenv("DB_PASSWORD"),
         database=os.getenv("DB_NAME"),
     )
+    tracker_connection = connect(
+        host=os.getenv("DB_HOST"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        database=os.getenv("DB_NAME"),
+    )
+    compactor_connection = connect(
+        host=os.getenv("DB_HOST"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        database=os.getenv("DB_NAME"),
+    )
 
     # Initialize API client and bot components
     api_client = robinhood.CryptoAPITrading()
     api = ExchangeAPI(api_client)
-    db_manager = DatabaseManager(connection)
-    strategy = ScalpingStrategy()
-    coin_data = ScalpingData()
+    features = build_default_registry()
+    db_manager = DatabaseManager(connection, features)
+    strategy = StrategyRunner(
+        [("scalping", ScalpingStrategy(), 1.0)],
+        time_budget=config.getfloat("DEFAULT", "strategy_time_budget", fallback=None),
+    )
+    ledger = PortfolioLedger()
+    coin_data = ScalpingData(ledger)
     trade_decision = TradeDecision()
-    bot = Bot(api, db_manager, strategy, config, coin_data, trade_decision)  # Pass config to Bot
+    order_tracker = OrderTracker(
+        api,
+        DatabaseManager(tracker_connection),
+        ledger,
+        stale_after=config.getfloat("DEFAULT", "order_stale_seconds", fallback=300),
+    )
+    bot = Bot(api, db_manager, strategy, config, coin_data, trade_decision, ledger, order_tracker, features)  # Pass config to Bot
+    compactor = ValueHistoryCompactor(
+        DatabaseManager(compactor_connection),
+        bot.coins,
+        timedelta(hours=config.getfloat("DEFAULT", "value_history_retention_hours", fallback=24)),
+        interval=config.getfloat("DEFAULT", "compaction_interval_seconds", fallback=3600),
+        max_chunks=config.getint("DEFAULT", "compaction_max_chunks", fallback=24),
+    )
+    order_tracker.start()
+    compactor.start()
+    tick_interval = config.getfloat("DEFAULT", "tick_interval", fallback=10)
+    max_ticks = config.getint("DEFAULT", "max_ticks", fallback=6)
     i = 0
     try:
-        while i < 6:
+        while i < max_ticks:
             bot.run()  # Run the bot
-            time.sleep(10) 
+            time.sleep(tick_interval)
             i += 1
     except Exception as e:
         logger.error(f"An error occurred during bot execution: {e}", exc_info=True)
     finally:
+        order_tracker.stop(timeout=15)
+        compactor.stop(timeout=60)
+        logger.info(f"Order-to-fill latency: {order_tracker.latency_stats()}")
+        logger.info(f"Strategy decision latency: {strategy.latency_stats()}")
         connection.close()  # Ensure database connection is closed
+        tracker_connection.close()
+        compactor_connection.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,52 @@
+import configparser
+
+from bot.core.bot import Bot
+from bot.core.portfolio import PortfolioLedger
+
+
+class ThrottledApi:
+    """
+    Every account request fails, as it would while the exchange answers with 429s.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def get_holdings(self):
+        self.calls.append("get_holdings")
+        return None
+
+    def get_account(self):
+        self.calls.append("get_account")
+        return None
+
+    def get_orders(self):
+        self.calls.append("get_orders")
+        return None
+
+
+class Features:
+    def begin_tick(self):
+        pass
+
+
+class CoinData:
+    def __init__(self):
+        self.compiled = 0
+
+    def compile_data(self, api, db_manager, config, coins):
+        self.compiled += 1
+        return {"results": [{"symbol": coin} for coin in coins]}
+
+
+def test_failed_seed_is_tried_once_per_tick_and_skips_the_tick():
+    config = configparser.ConfigParser()
+    config["DEFAULT"] = {"coins": '["BTC-USD", "ETH-USD", "SOL-USD"]'}
+    api, coin_data = ThrottledApi(), CoinData()
+    bot = Bot(api, None, object(), config, coin_data, None, PortfolioLedger(), features=Features())
+
+    bot.run()
+    bot.run()
+
+    assert api.calls == ["get_holdings", "get_account", "get_orders"] * 2
+    assert coin_data.compiled == 0
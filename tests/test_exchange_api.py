@@ -0,0 +1,38 @@
+from bot.exchange.exchange_api import ExchangeAPI
+
+
+class Client:
+    def __init__(self, pairs=None):
+        self.pairs = pairs
+        self.pair_requests = 0
+        self.placed = []
+
+    def get_trading_pairs(self, *symbols):
+        self.pair_requests += 1
+        if self.pairs is None:
+            return {"type": "server_error", "errors": [{"detail": "Internal error."}]}
+        return {"results": [self.pairs]}
+
+    def place_order(self, client_order_id, side, order_type, symbol, order_config):
+        self.placed.append((side, order_config["asset_quantity"], order_config["limit_price"]))
+        return {"id": client_order_id, "symbol": symbol, "side": side}
+
+
+def test_orders_are_rounded_to_the_pair_increments():
+    client = Client({"asset_increment": "0.0001", "quote_increment": "0.01"})
+    api = ExchangeAPI(client)
+
+    api.place_order("buy", "BTC-USD", 100.005, 0.13986013986013987)
+    api.place_order("sell", "BTC-USD", 100.009, 0.13989999)
+    assert client.placed == [("buy", "0.1398", "100.01"), ("sell", "0.1398", "100.00")]
+    assert client.pair_requests == 1
+
+
+def test_unknown_increments_fall_back_to_eight_decimals_and_dust_is_not_sent():
+    client = Client()
+    api = ExchangeAPI(client)
+
+    assert api.place_order("buy", "BTC-USD", 100.123456789, 0.13986013986013987)
+    assert client.placed == [("buy", "0.13986013", "100.12345679")]
+    assert api.place_order("sell", "BTC-USD", 100.0, 0.000000001) is None
+    assert len(client.placed) == 1
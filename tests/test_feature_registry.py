@@ -0,0 +1,109 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from bot.features import Feature, FeatureRegistry, build_default_registry
+from bot.features.registry import ASK, BID
+
+
+def frame(rows, start="2024-01-01 00:00:00", step="10s"):
+    timestamps = pd.date_range(start, periods=rows, freq=step)
+    bids = [100.0 + i for i in range(rows)]
+    return pd.DataFrame({"timestamp": timestamps, BID: bids, ASK: [bid + 0.5 for bid in bids]})
+
+
+def counting_registry():
+    calls = {"base": 0, "derived": 0}
+
+    def base(df):
+        calls["base"] += 1
+        return df[BID] * 2
+
+    def derived(df):
+        calls["derived"] += 1
+        return df["base"] + 1
+
+    registry = FeatureRegistry()
+    registry.add(Feature("derived", ["base"], derived))
+    registry.add(Feature("base", [BID], base))
+    return registry, calls
+
+
+def test_features_are_computed_in_dependency_order_once_per_tick():
+    registry, calls = counting_registry()
+    data = frame(5)
+
+    df = registry.compute("BTC-USD", data)
+    assert list(df["derived"]) == [2 * bid + 1 for bid in data[BID]]
+
+    registry.compute("BTC-USD", data)
+    registry.compute("BTC-USD", data, ["base"])
+    assert calls == {"base": 1, "derived": 1}
+
+    registry.begin_tick()
+    registry.compute("BTC-USD", data)
+    assert calls == {"base": 2, "derived": 2}
+
+
+def test_dependency_cycle_is_rejected():
+    registry = FeatureRegistry()
+    registry.add(Feature("a", ["b"], lambda df: df["b"]))
+    registry.add(Feature("b", ["a"], lambda df: df["a"]))
+    with pytest.raises(ValueError, match="cycle"):
+        registry.compute("BTC-USD", frame(3))
+
+
+def test_cache_is_keyed_by_length_and_rejects_a_different_frame():
+    registry, _ = counting_registry()
+
+    long = registry.compute("BTC-USD", frame(30), length=30)
+    short = registry.compute("BTC-USD", frame(20), length=20)
+    assert len(long) == 30 and len(short) == 20
+    assert registry.cached("BTC-USD", 20) is short
+
+    with pytest.raises(ValueError, match="differs"):
+        registry.compute("BTC-USD", frame(20, start="2024-01-02"), length=20)
+
+
+def test_value_history_manager_respects_requested_length():
+    from bot.database.value_history_manager import ValueHistoryManager
+
+    class Cursor:
+        def execute(self, query):
+            self.limit = int(query.rsplit("LIMIT", 1)[1])
+
+        def fetchall(self):
+            rows = frame(self.limit)
+            return list(rows.itertuples(index=False, name=None))[::-1]
+
+        def close(self):
+            pass
+
+    class Connection:
+        def cursor(self):
+            return Cursor()
+
+    manager = ValueHistoryManager(Connection(), build_default_registry())
+    assert len(manager.get_value_history("BTC-USD", 200)) > len(manager.get_value_history("BTC-USD", 150))
+
+    # Only the 10-row volatility window trims the history; the 15 minute gap window doesn't
+    short = manager.get_value_history("ETH-USD", 20)
+    assert len(short) == 11
+    assert list(short.columns) == ["timestamp", BID, ASK, "spread", "price_change", "momentum", "volatility"]
+
+
+def test_windows_leave_features_undefined_without_enough_history():
+    registry = build_default_registry()
+    df = registry.compute("BTC-USD", frame(120))  # 10s ticks: the 15 minute window is covered from row 90
+
+    assert df["volatility"].iloc[:9].isna().all() and df["volatility"].iloc[9:].notna().all()
+    assert df["avg_5min"].iloc[:30].isna().all() and df["avg_5min"].iloc[30:].notna().all()
+    assert df["gap_5_15"].iloc[:90].isna().all() and df["gap_5_15"].iloc[90:].notna().all()
+
+    short = registry.compute("ETH-USD", frame(60))  # only 10 minutes of history
+    assert short["gap_5_15"].isna().all()
+
+
+def test_time_window_requires_timestamp_input():
+    with pytest.raises(ValueError, match="timestamp"):
+        Feature("avg", [BID], lambda df: df[BID], window="5min")
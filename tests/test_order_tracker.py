@@ -0,0 +1,143 @@
+import threading
+import time
+
+from bot.core.order_tracker import OrderTracker
+
+
+class FakeApi:
+    def __init__(self, cancel_results=None):
+        self.orders = {}
+        self.cancel_results = list(cancel_results or [])
+        self.cancel_calls = []
+
+    def get_order(self, order_id):
+        return self.orders.get(order_id)
+
+    def cancel_order(self, order_id):
+        self.cancel_calls.append(order_id)
+        return self.cancel_results.pop(0) if self.cancel_results else True
+
+
+class FakeLedger:
+    def __init__(self):
+        self.fills = []
+
+    def apply_fill(self, order):
+        self.fills.append((order["id"], order["filled_asset_quantity"]))
+
+
+class FakeOrderHistory:
+    def __init__(self):
+        self.rows = []
+
+    def insert_or_update_order(self, table_name, order):
+        self.rows.append((table_name, order["id"], order["state"]))
+
+
+class FakeDatabaseManager:
+    def __init__(self):
+        self.order_history = FakeOrderHistory()
+
+
+def order(order_id, state="open", filled=0):
+    return {"id": order_id, "symbol": "BTC-USD", "side": "buy", "state": state, "filled_asset_quantity": str(filled)}
+
+
+def make_tracker(api, **kwargs):
+    return OrderTracker(api, FakeDatabaseManager(), FakeLedger(), initial_interval=1.0, max_interval=4.0,
+                        backoff=2.0, **kwargs)
+
+
+def test_backoff_resets_on_partial_fill_and_terminal_state_stops_tracking():
+    api = FakeApi()
+    tracker = make_tracker(api)
+    tracker.register(order("a"))
+    api.orders["a"] = order("a")
+
+    tracker._poll("a")
+    tracker._poll("a")
+    assert tracker._orders["a"]["interval"] == 4.0
+
+    api.orders["a"] = order("a", state="partially_filled", filled=0.1)
+    tracker._poll("a")
+    assert tracker._orders["a"]["interval"] == 1.0
+    assert tracker.ledger.fills == [("a", "0.1")]
+
+    api.orders["a"] = order("a", state="filled", filled=0.3)
+    tracker._poll("a")
+    assert tracker.pending() == 0
+    assert tracker.ledger.fills == [("a", "0.1"), ("a", "0.3")]
+    assert tracker.latency_stats()["count"] == 1
+    assert [row[2] for row in tracker.db_manager.order_history.rows] == ["partially_filled", "filled"]
+
+
+def test_failed_cancel_of_stale_order_is_retried():
+    api = FakeApi(cancel_results=[False, True])
+    tracker = make_tracker(api, stale_after=0.0)
+    tracker.register(order("a"))
+    api.orders["a"] = order("a")
+    time.sleep(0.01)
+
+    tracker._poll("a")
+    assert not tracker._orders["a"]["cancel_requested"]
+    tracker._poll("a")
+    assert tracker._orders["a"]["cancel_requested"]
+    tracker._poll("a")
+    assert api.cancel_calls == ["a", "a"]
+
+    api.orders["a"] = order("a", state="canceled")
+    tracker._poll("a")
+    assert tracker.pending() == 0
+    assert tracker.db_manager.order_history.rows == [("btc_order_history", "a", "canceled")]
+
+
+def test_order_without_data_is_cancelled_when_stale_then_dropped():
+    api = FakeApi()  # get_order returns None for every id, as for a 404
+    tracker = make_tracker(api, stale_after=0.0, max_failed_lookups=3)
+    tracker.register(order("a"))
+    time.sleep(0.01)
+
+    tracker._poll("a")
+    assert api.cancel_calls == ["a"]
+    tracker._poll("a")
+    assert tracker.pending() == 1
+    tracker._poll("a")
+    assert tracker.pending() == 0
+    assert api.cancel_calls == ["a"]
+
+
+def test_successful_lookup_resets_failed_lookup_count():
+    api = FakeApi()
+    tracker = make_tracker(api, max_failed_lookups=2)
+    tracker.register(order("a"))
+
+    tracker._poll("a")
+    api.orders["a"] = order("a")
+    tracker._poll("a")
+    del api.orders["a"]
+    tracker._poll("a")
+    assert tracker.pending() == 1
+
+
+def test_due_orders_are_polled_concurrently():
+    barrier = threading.Barrier(3, timeout=2)
+
+    class SlowApi(FakeApi):
+        def get_order(self, order_id):
+            # Only returns once three polls are in flight at the same time
+            barrier.wait()
+            return order(order_id, state="filled", filled=1)
+
+    tracker = OrderTracker(SlowApi(), FakeDatabaseManager(), FakeLedger(), initial_interval=0.0, poll_workers=3)
+    for order_id in ("a", "b", "c"):
+        tracker.register(order(order_id))
+    tracker.start()
+    try:
+        deadline = time.monotonic() + 2
+        while tracker.pending() and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        tracker.stop(timeout=2)
+
+    assert tracker.pending() == 0
+    assert not barrier.broken
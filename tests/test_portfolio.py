@@ -0,0 +1,232 @@
+import pytest
+
+from bot.core.portfolio import PortfolioLedger
+
+
+class FakeApi:
+    def __init__(self, buying_power=1000.0, holdings=None, orders=None, prices=None):
+        self.buying_power = buying_power
+        self.holdings = holdings or []
+        self.orders = orders or []
+        self.prices = prices or {}
+
+    def get_holdings(self):
+        return self.holdings
+
+    def get_account(self):
+        return str(self.buying_power)
+
+    def get_orders(self):
+        return self.orders
+
+    def get_best_price(self, coins):
+        return {"results": [quote(symbol, self.prices[symbol]) for symbol in coins if symbol in self.prices]}
+
+
+def quote(symbol, ask):
+    return {"symbol": symbol, "ask_inclusive_of_buy_spread": str(ask), "bid_inclusive_of_sell_spread": str(ask)}
+
+
+def order(order_id, side, filled, price, state="filled", symbol="BTC-USD", quantity=None, limit_price=None):
+    data = {
+        "id": order_id,
+        "symbol": symbol,
+        "side": side,
+        "state": state,
+        "filled_asset_quantity": str(filled),
+        "average_price": str(price) if filled else None,
+    }
+    if quantity is not None:
+        data["limit_order_config"] = {"asset_quantity": quantity, "limit_price": limit_price}
+    return data
+
+
+def test_seed_adds_back_cash_held_for_open_buys():
+    # 0.3 BTC resting at 10000 holds 3000 out of buying power
+    api = FakeApi(buying_power=919.24, orders=[order("a", "buy", 0, 0, state="open", quantity=0.3, limit_price=10000)])
+    ledger = PortfolioLedger()
+    ledger.seed(api)
+    assert ledger.cash == pytest.approx(3919.24)
+
+    # Order fills at 9000: exchange refunds the price improvement, ledger pays the fill once
+    ledger.apply_fill(order("a", "buy", 0.3, 9000))
+    assert ledger.cash == pytest.approx(919.24 + 300)
+    assert ledger.quantity("BTC-USD") == pytest.approx(0.3)
+
+
+def test_fills_already_in_seeded_balance_are_not_applied_again():
+    api = FakeApi(
+        buying_power=500.0,
+        holdings=[{"asset_code": "BTC", "total_quantity": "0.5"}],
+        orders=[order("a", "buy", 0.5, 1000), order("b", "buy", 0.2, 1000, state="partially_filled",
+                                                     quantity=0.4, limit_price=1000)],
+        prices={"BTC-USD": 1000},
+    )
+    ledger = PortfolioLedger()
+    ledger.seed(api)
+
+    assert ledger.apply_fill(order("a", "buy", 0.5, 1000)) is False
+    assert ledger.apply_fill(order("b", "buy", 0.4, 1000)) is True  # only the 0.2 delta
+    assert ledger.quantity("BTC-USD") == pytest.approx(0.7)
+    assert ledger.cash == pytest.approx(500.0 + 200.0 - 200.0)
+
+
+def test_partial_fills_apply_deltas_and_are_idempotent():
+    ledger = PortfolioLedger()
+    ledger.seed(FakeApi(buying_power=1000.0))
+
+    assert ledger.apply_fill(order("a", "buy", 0.1, 100, state="partially_filled"))
+    assert not ledger.apply_fill(order("a", "buy", 0.1, 100, state="partially_filled"))
+    assert ledger.apply_fill(order("a", "buy", 0.3, 100))
+    assert ledger.quantity("BTC-USD") == pytest.approx(0.3)
+    assert ledger.cash == pytest.approx(970.0)
+    assert ledger.last_purchase_price("BTC-USD") == 100.0
+
+
+def test_mark_to_market_and_sell_to_zero():
+    ledger = PortfolioLedger(allocation_fraction=0.5)
+    ledger.seed(FakeApi(buying_power=1000.0))
+    ledger.apply_fill(order("a", "buy", 2, 100))
+    ledger.mark_to_market([quote("BTC-USD", 150)])
+
+    assert ledger.exposure("BTC-USD") == pytest.approx(300.0)
+    assert ledger.total_value() == pytest.approx(800.0 + 300.0)
+    assert ledger.allocation() == pytest.approx(550.0)
+
+    ledger.apply_fill(order("b", "sell", 2, 150))
+    assert not ledger.holds("BTC-USD")
+    assert ledger.total_value() == pytest.approx(1100.0)
+
+
+def test_reconcile_with_open_buy_reports_no_cash_drift():
+    api = FakeApi(buying_power=1000.0)
+    ledger = PortfolioLedger()
+    ledger.seed(api)
+
+    api.buying_power = 700.0
+    api.orders = [order("a", "buy", 0, 0, state="open", quantity=3, limit_price=100)]
+    assert ledger.reconcile(api) == {}
+    assert ledger.cash == pytest.approx(1000.0)
+
+    api.holdings = [{"asset_code": "ETH", "total_quantity": "1"}]
+    assert ledger.reconcile(api) == {"ETH": (0.0, 1.0)}
+
+
+def test_seed_reads_last_purchase_prices_from_order_history():
+    class OrderHistory:
+        def get_last_buy_price(self, table_name):
+            if table_name == "eth_order_history":
+                raise RuntimeError("table doesn't exist")
+            return {"btc_order_history": 95.5}.get(table_name)
+
+    class DatabaseManager:
+        order_history = OrderHistory()
+
+    api = FakeApi(
+        holdings=[{"asset_code": "BTC", "total_quantity": "1"}, {"asset_code": "ETH", "total_quantity": "2"}],
+        prices={"BTC-USD": 100, "ETH-USD": 10},
+    )
+    ledger = PortfolioLedger()
+    ledger.seed(api, DatabaseManager())
+
+    assert ledger.last_purchase_price("BTC-USD") == 95.5
+    assert ledger.last_purchase_price("ETH-USD") is None
+    assert ledger.holds("ETH-USD")
+
+
+def test_exchange_calls_happen_outside_the_lock():
+    import threading
+
+    ledger = PortfolioLedger()
+
+    class BlockingApi(FakeApi):
+        def get_account(self):
+            # A reader on another thread must not wait for this "network call"
+            reader = threading.Thread(target=ledger.total_value)
+            reader.start()
+            reader.join(timeout=1)
+            self.reader_finished = not reader.is_alive()
+            return super().get_account()
+
+    api = BlockingApi()
+    ledger.seed(api)
+    assert api.reader_finished
+    ledger.reconcile(api)
+    assert api.reader_finished
+
+
+def test_strategy_views_book_only_their_own_fills():
+    api = FakeApi(buying_power=1000.0, holdings=[{"asset_code": "ETH", "total_quantity": "1"}], prices={"ETH-USD": 10})
+    ledger = PortfolioLedger()
+    ledger.seed(api)
+    ledger.assign_order("a", "momentum")
+    ledger.assign_order("b", "scalping")
+
+    ledger.apply_fill(order("a", "buy", 0.5, 100))
+    ledger.apply_fill(order("b", "buy", 0.2, 110, state="partially_filled"))
+    momentum, scalping = ledger.view("momentum"), ledger.view("scalping")
+
+    assert momentum.quantity("BTC-USD") == pytest.approx(0.5)
+    assert momentum.last_purchase_price("BTC-USD") == 100.0
+    assert scalping.quantity("BTC-USD") == pytest.approx(0.2)
+    assert scalping.last_purchase_price("BTC-USD") == 110.0
+    assert not momentum.holds("ETH-USD") and ledger.holds("ETH-USD")  # pre-existing holding belongs to no strategy
+
+    # The rest of b fills while unseen; reconcile books it from the order list
+    api.holdings = [{"asset_code": "ETH", "total_quantity": "1"}, {"asset_code": "BTC", "total_quantity": "0.9"}]
+    api.orders = [order("a", "buy", 0.5, 100), order("b", "buy", 0.4, 110)]
+    ledger.reconcile(api)
+    assert scalping.quantity("BTC-USD") == pytest.approx(0.4)
+
+    ledger.assign_order("c", "momentum")
+    ledger.apply_fill(order("c", "sell", 0.5, 120))
+    assert not momentum.holds("BTC-USD")
+    assert scalping.quantity("BTC-USD") == pytest.approx(0.4)
+
+    ledger.apply_fill(order("d", "sell", 0.3, 120))  # unassigned sell leaves the books alone...
+    assert scalping.quantity("BTC-USD") == pytest.approx(0.1)  # ...but a view never exceeds the account
+
+
+def test_holdings_snapshot_comes_from_the_ledger():
+    ledger = PortfolioLedger()
+    ledger.seed(FakeApi(buying_power=1000.0, holdings=[{"asset_code": "ETH", "total_quantity": "2"}], prices={"ETH-USD": 10}))
+    ledger.apply_fill(order("a", "buy", 0.5, 100))
+
+    assert sorted(ledger.holdings(), key=lambda holding: holding["asset_code"]) == [
+        {"asset_code": "BTC", "total_quantity": "0.5", "last_purchase_price": "100.0"},
+        {"asset_code": "ETH", "total_quantity": "2.0"},
+    ]
+
+
+def test_strategy_positions_are_rebuilt_from_order_history_on_restart():
+    class OrderHistory:
+        def get_last_buy_price(self, table_name):
+            return None
+
+        def get_strategy_orders(self, table_name):
+            assert table_name == "btc_order_history"
+            return [
+                ("a", "momentum", "buy", 0.5, 100.0),
+                ("b", "scalping", "buy", 0.2, 110.0),  # recorded while partially filled
+                ("c", "momentum", "sell", 0.1, 120.0),
+            ]
+
+    class DatabaseManager:
+        order_history = OrderHistory()
+
+    # b finished filling while the bot was down
+    api = FakeApi(
+        buying_power=1000.0,
+        holdings=[{"asset_code": "BTC", "total_quantity": "0.8"}],
+        orders=[order("a", "buy", 0.5, 100), order("b", "buy", 0.4, 110), order("c", "sell", 0.1, 120)],
+        prices={"BTC-USD": 120},
+    )
+    ledger = PortfolioLedger()
+    ledger.seed(api, DatabaseManager())
+    momentum, scalping = ledger.view("momentum"), ledger.view("scalping")
+
+    assert momentum.quantity("BTC-USD") == pytest.approx(0.4)
+    assert momentum.last_purchase_price("BTC-USD") == 100.0
+    assert scalping.quantity("BTC-USD") == pytest.approx(0.4)
+    assert scalping.last_purchase_price("BTC-USD") == 110.0
+    assert ledger.quantity("BTC-USD") == pytest.approx(0.8)
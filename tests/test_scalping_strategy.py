@@ -0,0 +1,68 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from bot.features import build_default_registry
+from bot.features.registry import ASK, BID
+from bot.strategies import ScalpingStrategy
+
+
+class Api:
+    def __init__(self):
+        self.orders = []
+
+    def place_order(self, order_type, coin, price, quantity):
+        self.orders.append((order_type, coin, quantity))
+        return {"id": str(len(self.orders)), "symbol": coin}
+
+
+class Ledger:
+    def __init__(self, quantity=0.0, last_purchase_price=None):
+        self._quantity = quantity
+        self._last_purchase_price = last_purchase_price
+
+    def holds(self, coin):
+        return self._quantity > 0
+
+    def quantity(self, coin):
+        return self._quantity
+
+    def last_purchase_price(self, coin):
+        return self._last_purchase_price
+
+
+def compiled(rows, ledger, bid):
+    bids = [100.0 - 0.01 * i for i in range(rows)]  # falling prices: a strong entry signal once 15 minutes exist
+    history = pd.DataFrame({
+        "timestamp": pd.date_range("2024-01-01", periods=rows, freq="10s"),
+        BID: bids,
+        ASK: [value + 0.05 for value in bids],
+    })
+    return {
+        "symbol": "BTC-USD",
+        "api": Api(),
+        "ledger": ledger,
+        "features": build_default_registry(),
+        "holdings": [],
+        "buying_power": 1000.0,
+        "value_history": history,
+        "price_data": {"bid_price": str(bid), "ask_price": str(bid + 0.05)},
+    }
+
+
+def test_short_history_never_buys_but_still_takes_profit():
+    strategy = ScalpingStrategy()
+
+    no_position = compiled(30, Ledger(), bid=100.0)
+    strategy.execute_strategy(no_position)
+    assert no_position["api"].orders == []
+
+    held = compiled(30, Ledger(quantity=0.25, last_purchase_price=90.0), bid=100.0)
+    strategy.execute_strategy(held)
+    assert held["api"].orders == [("sell", "BTC-USD", 0.25)]
+
+
+def test_full_history_buys():
+    data = compiled(120, Ledger(), bid=100.0)
+    ScalpingStrategy().execute_strategy(data)
+    assert [order[0] for order in data["api"].orders] == ["buy"]
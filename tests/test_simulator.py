@@ -0,0 +1,76 @@
+import time
+
+import pytest
+
+pytest.importorskip("nacl")
+
+from bot.exchange.simulator import SimulatedMarket
+
+
+def market(**kwargs):
+    market = SimulatedMarket(buying_power=10000.0, volatility=0.0, spread_bps=0.0, **kwargs)
+    market._prices["BTC-USD"] = (100.0, time.monotonic())
+    return market
+
+
+def set_price(market, price):
+    market._prices["BTC-USD"] = (price, time.monotonic())
+
+
+def limit(side, quantity, price):
+    return {"side": side, "type": "limit", "symbol": "BTC-USD",
+            "limit_order_config": {"asset_quantity": str(quantity), "limit_price": str(price)}}
+
+
+def test_limit_order_rests_until_crossed_then_leaves_the_match_index():
+    sim = market()
+    order, error = sim.place_order(limit("buy", 2, 90))
+    assert error is None and order["state"] == "open"
+    assert sim.open_symbols() == {"BTC-USD"}
+    assert sim.buying_power == pytest.approx(10000.0 - 180.0)
+
+    set_price(sim, 89.0)
+    sim.step()
+    filled = sim.get_order(order["id"])
+    assert filled["state"] == "filled"
+    assert float(filled["average_price"]) == pytest.approx(89.0)
+    assert sim.buying_power == pytest.approx(10000.0 - 178.0)  # price improvement refunded
+    assert sim.open_symbols() == set()
+
+
+def test_partial_fills_stay_open_and_cancel_releases_the_rest():
+    sim = market(partial_fill_ratio=0.5)
+    sim.holdings["BTC"] = {"total": 4.0, "reserved": 0.0}
+    order, _ = sim.place_order(limit("sell", 4, 100))
+
+    assert sim.get_order(order["id"])["state"] == "partially_filled"
+    assert sim.open_symbols() == {"BTC-USD"}
+
+    assert sim.cancel_order(order["id"]) == (True, None)
+    assert sim.holdings["BTC"] == {"total": 2.0, "reserved": 0.0}
+    assert sim.open_symbols() == set()
+    assert sim.cancel_order(order["id"])[0] is False
+
+
+def test_closed_orders_beyond_the_limit_are_dropped():
+    sim = market(closed_order_limit=2)
+    ids = [sim.place_order(limit("buy", 1, 100))[0]["id"] for _ in range(3)]
+    resting, _ = sim.place_order(limit("buy", 1, 50))
+
+    assert sim.get_order(ids[0]) is None
+    assert [sim.get_order(order_id)["state"] for order_id in ids[1:]] == ["filled", "filled"]
+    assert sim.get_order(resting["id"])["state"] == "open"
+    assert len(sim.orders) == 3
+
+
+def test_quantities_and_prices_finer_than_the_increments_are_rejected():
+    sim = market(asset_increment="0.0001", quote_increment="0.01")
+    assert sim.trading_pair("BTC-USD")["asset_increment"] == "0.0001"
+
+    order, error = sim.place_order(limit("buy", 0.13986013986013987, 100))
+    assert order is None and "asset increment" in error
+    order, error = sim.place_order(limit("buy", "0.1398", "100.005"))
+    assert order is None and "quote increment" in error
+
+    order, error = sim.place_order(limit("buy", "0.1398", "100.01"))
+    assert error is None and order["state"] == "filled"
@@ -0,0 +1,130 @@
+import base64
+import configparser
+import json
+import threading
+import time
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("nacl")
+pytest.importorskip("requests")
+
+from nacl.signing import SigningKey
+
+from bot.core.bot import Bot
+from bot.core.portfolio import PortfolioLedger
+from bot.exchange import ExchangeAPI, robinhood
+from bot.exchange.simulator import SimulatedMarket, build_server
+from bot.features import build_default_registry
+from bot.features.registry import ASK, BID
+from bot.strategies import ScalpingStrategy
+from bot.strategies.scalping_helpers import ScalpingData, TradeDecision
+
+COINS = ["BTC-USD", "ETH-USD"]
+
+
+class ValueHistory:
+    """
+    Stands in for the MySQL-backed ValueHistoryManager: a falling 20 minute history per coin,
+    which the scalping strategy reads as a strong entry signal.
+    """
+
+    def __init__(self, features):
+        self.features = features
+        self.inserted = []
+
+    def insert_data(self, results):
+        self.inserted.append(results)
+
+    def get_value_history(self, coin_symbol, length):
+        df = self.features.cached(coin_symbol, length)
+        if df is None:
+            bids = [100.0 - 0.01 * i for i in range(length)]
+            df = pd.DataFrame({
+                "timestamp": pd.date_range("2024-01-01", periods=length, freq="10s"),
+                BID: bids,
+                ASK: [bid + 0.05 for bid in bids],
+            })
+        return self.features.compute(coin_symbol, df, length=length).dropna()
+
+    def get_rollup_history(self, coin_symbols, interval, length):
+        return pd.DataFrame(columns=["symbol", "spread_sum", "sample_count"])
+
+
+class OrderHistory:
+    def __init__(self):
+        self.orders = {}
+        self.strategies = {}
+
+    def insert_or_update_order(self, table_name, order):
+        self.orders[order["id"]] = (table_name, order["state"])
+
+    def get_last_buy_price(self, table_name):
+        return None
+
+    def assign_strategy(self, order_id, symbol, strategy):
+        self.strategies[order_id] = strategy
+
+    def get_strategy_orders(self, table_name):
+        return []
+
+
+class Timestamps:
+    def __init__(self):
+        self.last = {}
+
+    def get_last_timestamp(self, coin_symbol):
+        return self.last.get(coin_symbol)
+
+    def update_last_timestamp(self, coin_symbol, timestamp):
+        self.last[coin_symbol] = timestamp
+
+
+class DatabaseManager:
+    def __init__(self, features):
+        self.value_history = ValueHistory(features)
+        self.order_history = OrderHistory()
+        self.timestamps = Timestamps()
+
+
+@pytest.fixture
+def simulator(monkeypatch):
+    signing_key = SigningKey.generate()
+    monkeypatch.setenv("API_KEY", "soak-test")
+    monkeypatch.setenv("BASE64_PRIVATE_KEY", base64.b64encode(bytes(signing_key)).decode())
+
+    market = SimulatedMarket(buying_power=100000.0, volatility=0.0, spread_bps=5.0)
+    for symbol in COINS:
+        market._prices[symbol] = (100.0, time.monotonic())
+    server = build_server("127.0.0.1", 0, market, signing_key.verify_key, "soak-test")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv("API_BASE_URL", f"http://127.0.0.1:{server.server_address[1]}")
+    yield market
+    server.shutdown()
+    server.server_close()
+
+
+def test_bot_trades_against_the_simulator(simulator):
+    config = configparser.ConfigParser()
+    config["DEFAULT"] = {"coins": json.dumps(COINS), "coin_history_length": "200"}
+    api = ExchangeAPI(robinhood.CryptoAPITrading())
+    features = build_default_registry()
+    db_manager = DatabaseManager(features)
+    ledger = PortfolioLedger(drift_tolerance=0.01)  # buying power is reported in cents
+    bot = Bot(api, db_manager, ScalpingStrategy(), config, ScalpingData(ledger), TradeDecision(), ledger, None, features)
+
+    # Tick 1: both coins are bought at the ask and fill immediately
+    bot.run()
+    assert all(ledger.holds(symbol) for symbol in COINS)
+    assert len(db_manager.order_history.orders) == 2
+    assert set(db_manager.order_history.strategies.values()) == {"default"}
+    assert ledger.cash == pytest.approx(simulator.buying_power)
+    assert ledger.quantity("BTC-USD") == pytest.approx(float(simulator.holdings_list(["BTC"])[0]["total_quantity"]))
+
+    # Tick 2: BTC rallies past take-profit and the whole position is sold
+    simulator._prices["BTC-USD"] = (103.0, time.monotonic())
+    bot.run()
+    assert not ledger.holds("BTC-USD") and ledger.holds("ETH-USD")
+    assert "BTC" not in {holding["asset_code"] for holding in simulator.holdings_list()}
+    assert ledger.reconcile(api) == {}
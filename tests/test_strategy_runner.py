@@ -0,0 +1,128 @@
+import time
+
+from bot.core.portfolio import PortfolioLedger
+from bot.core.strategy_runner import StrategyRunner
+
+
+class SlowExchangeApi:
+    def place_order(self, **kwargs):
+        time.sleep(0.05)
+        return {"id": "order-1"}
+
+
+class RecordingStrategy:
+    def __init__(self, decision_time=0.0, trade=False):
+        self.decision_time = decision_time
+        self.trade = trade
+        self.calls = []
+
+    def execute_strategy(self, compiled_data):
+        self.calls.append(compiled_data["symbol"])
+        time.sleep(self.decision_time)
+        if self.trade:
+            compiled_data["api"].place_order(order_type="buy", coin=compiled_data["symbol"], price=1.0, quantity=1.0)
+
+
+class FakeLedger:
+    def __init__(self, held=()):
+        self.held = set(held)
+        self.assigned = {}
+
+    def holds(self, coin):
+        return coin in self.held
+
+    def assign_order(self, order_id, strategy_name):
+        self.assigned[order_id] = strategy_name
+
+
+def coin_data(symbol, ledger):
+    return {"symbol": symbol, "api": SlowExchangeApi(), "ledger": ledger, "buying_power": 100.0}
+
+
+def test_exchange_latency_is_not_charged_to_the_decision_budget():
+    strategy = RecordingStrategy(trade=True)
+    runner = StrategyRunner([("a", strategy, 1.0)], time_budget=0.04)
+    runner.begin_tick()
+
+    for symbol in ("BTC-USD", "ETH-USD", "DOGE-USD"):
+        runner.execute_strategy(coin_data(symbol, FakeLedger()))
+
+    assert strategy.calls == ["BTC-USD", "ETH-USD", "DOGE-USD"]
+    assert runner.latency_stats()["a"]["max"] < 0.04
+
+
+def test_exhausted_budget_still_runs_exits_for_held_coins():
+    strategy = RecordingStrategy(decision_time=0.02)
+    runner = StrategyRunner([("a", strategy, 1.0)], time_budget=0.01)
+    ledger = FakeLedger(held={"ETH-USD"})
+    runner.begin_tick()
+
+    for symbol in ("BTC-USD", "SOL-USD", "ETH-USD"):
+        runner.execute_strategy(coin_data(symbol, ledger))
+
+    assert strategy.calls == ["BTC-USD", "ETH-USD"]
+    assert runner.latency_stats()["a"]["skipped"] == 1
+
+    runner.begin_tick()
+    runner.execute_strategy(coin_data("SOL-USD", ledger))
+    assert strategy.calls[-1] == "SOL-USD"
+
+
+def test_capital_weights_scale_buying_power():
+    seen = []
+
+    class Strategy:
+        def execute_strategy(self, compiled_data):
+            seen.append(compiled_data["buying_power"])
+
+    runner = StrategyRunner([("a", Strategy(), 0.25), ("b", Strategy(), 0.75)])
+    runner.execute_strategy(coin_data("BTC-USD", None))
+    assert seen == [25.0, 75.0]
+
+
+def test_strategies_only_see_and_exit_their_own_positions():
+    class Api:
+        def __init__(self):
+            self.placed = []
+
+        def place_order(self, order_type, coin, price, quantity):
+            order_id = f"order-{len(self.placed)}"
+            self.placed.append(order_id)
+            return {"id": order_id, "symbol": coin}
+
+    class Strategy:
+        def __init__(self, buy):
+            self.buy = buy
+            self.seen = []
+
+        def execute_strategy(self, compiled_data):
+            ledger = compiled_data["ledger"]
+            coin = compiled_data["symbol"]
+            self.seen.append((ledger.holds(coin), ledger.quantity(coin)))
+            if self.buy:
+                compiled_data["api"].place_order(order_type="buy", coin=coin, price=10.0, quantity=2.0)
+
+    class OrderHistory:
+        def __init__(self):
+            self.assigned = []
+
+        def assign_strategy(self, order_id, symbol, strategy):
+            self.assigned.append((order_id, symbol, strategy))
+
+    class DatabaseManager:
+        order_history = OrderHistory()
+
+    ledger, db_manager = PortfolioLedger(), DatabaseManager()
+    a, b = Strategy(buy=True), Strategy(buy=False)
+    runner = StrategyRunner([("a", a, 0.5), ("b", b, 0.5)])
+    runner.execute_strategy({"symbol": "BTC-USD", "api": Api(), "ledger": ledger, "buying_power": 100.0,
+                             "db_manager": db_manager})
+    assert ledger._order_strategies == {"order-0": "a"}
+    assert db_manager.order_history.assigned == [("order-0", "BTC-USD", "a")]
+
+    ledger.apply_fill({"id": "order-0", "symbol": "BTC-USD", "side": "buy", "state": "filled",
+                       "filled_asset_quantity": "2", "average_price": "10"})
+    runner.execute_strategy({"symbol": "BTC-USD", "api": Api(), "ledger": ledger, "buying_power": 100.0})
+
+    assert a.seen[-1] == (True, 2.0)
+    assert b.seen[-1] == (False, 0.0)
@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from bot.core.value_history_compactor import ValueHistoryCompactor
+
+
+class FakeValueHistory:
+    def __init__(self):
+        self.calls = []
+
+    def compact(self, coin_symbol, max_age, max_chunks=None):
+        self.calls.append((coin_symbol, max_age, max_chunks))
+        if coin_symbol == "BAD-USD":
+            raise RuntimeError("table missing")
+        return 10
+
+
+class FakeDatabaseManager:
+    def __init__(self):
+        self.value_history = FakeValueHistory()
+
+
+def test_run_once_caps_work_per_coin_and_survives_errors():
+    db_manager = FakeDatabaseManager()
+    compactor = ValueHistoryCompactor(db_manager, ["BTC-USD", "BAD-USD", "ETH-USD"], timedelta(hours=6), max_chunks=3)
+
+    assert compactor.run_once() == 20
+    assert db_manager.value_history.calls == [
+        ("BTC-USD", timedelta(hours=6), 3),
+        ("BAD-USD", timedelta(hours=6), 3),
+        ("ETH-USD", timedelta(hours=6), 3),
+    ]
+
+
+def test_background_thread_stops_promptly():
+    compactor = ValueHistoryCompactor(FakeDatabaseManager(), ["BTC-USD"], timedelta(hours=6), interval=3600)
+    compactor.start()
+    compactor.stop(timeout=1)
+    assert not compactor._thread.is_alive()
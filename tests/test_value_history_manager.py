@@ -0,0 +1,84 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from bot.database.value_history_manager import ROLLUP_INTERVALS, ValueHistoryManager
+
+
+class FakeCursor:
+    def __init__(self, log):
+        self.log = log
+
+    def execute(self, sql, values=None):
+        self.log.append(("execute", sql, values))
+
+    def executemany(self, sql, rows):
+        self.log.append(("executemany", sql, list(rows)))
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.log = []
+
+    def cursor(self):
+        return FakeCursor(self.log)
+
+    def commit(self):
+        self.log.append(("commit",))
+
+    def rollback(self):
+        self.log.append(("rollback",))
+
+
+def quote(symbol, bid, ask, timestamp="2026-01-01T00:00:05Z"):
+    return {"symbol": symbol, "price": str((bid + ask) / 2), "bid_inclusive_of_sell_spread": str(bid),
+            "ask_inclusive_of_buy_spread": str(ask), "timestamp": timestamp}
+
+
+def test_insert_data_batches_rollups_per_interval_across_coins():
+    connection = FakeConnection()
+    manager = ValueHistoryManager(connection)
+    manager.insert_data([quote("BTC-USD", 99, 101), quote("ETH-USD", 9, 11), quote("SOL-USD", 1, 2)])
+
+    batches = [entry for entry in connection.log if entry[0] == "executemany"]
+    assert len(batches) == len(ROLLUP_INTERVALS)
+    for _, sql, rows in batches:
+        assert "value_history_rollup_" in sql
+        assert [row[0] for row in rows] == ["BTC-USD", "ETH-USD", "SOL-USD"]
+
+    one_minute = batches[0][2][0]
+    assert one_minute[1] == pd.Timestamp("2026-01-01 00:00:00").to_pydatetime()
+    assert one_minute[-4] == pytest.approx(2.0)  # spread_sum
+
+
+def test_insert_data_rolls_back_raw_rows_when_rollups_fail():
+    class FailingCursor(FakeCursor):
+        def executemany(self, sql, rows):
+            raise RuntimeError("lock wait timeout")
+
+    connection = FakeConnection()
+    connection.cursor = lambda: FailingCursor(connection.log)
+    manager = ValueHistoryManager(connection)
+    manager.insert_data([quote("BTC-USD", 99, 101)])
+
+    assert connection.log[-1] == ("rollback",)
+    assert connection.log[-2][0] == "execute" and "INSERT INTO btc_value_history" in connection.log[-2][1]
+
+
+def test_build_rollups_aggregates_ohlc_and_spread():
+    raw = pd.DataFrame({
+        "timestamp": pd.to_datetime(["2026-01-01 00:00:10", "2026-01-01 00:00:20", "2026-01-01 00:01:05"]),
+        "price": [10.0, 12.0, 11.0],
+        "ask": [10.5, 12.5, 11.2],
+        "bid": [9.5, 11.5, 10.8],
+    })
+    rows = ValueHistoryManager._build_rollups("BTC-USD", raw, "1min")
+
+    assert len(rows) == 2
+    symbol, bucket, open_, high, low, close = rows[0][:6]
+    assert (symbol, open_, high, low, close) == ("BTC-USD", 10.0, 12.0, 10.0, 12.0)
+    assert rows[0][14] == pytest.approx(2.0)  # spread_sum
+    assert rows[0][15] == 2  # sample_count